@@ -0,0 +1,60 @@
+"""
+Compare the annotation propagation pipeline against looping over
+'ancestors' and 'most_specific_terms' for each sample.
+
+Usage: python benchmarks/bench_annotation_propagation.py [ontology configuration ID]
+"""
+import random
+import sys
+import time
+from collections import Counter
+
+from onto_lib import ontology_graph
+from onto_lib.annotation_propagation import AnnotationPropagator
+from onto_lib.load_ontology import load
+
+
+def naive(og, annotations):
+    counts = Counter()
+    labels = []
+    sample_to_terms = {}
+    for sample, t_id in annotations:
+        sample_to_terms.setdefault(sample, []).append(t_id)
+    for sample, t_ids in sample_to_terms.items():
+        closure = set()
+        for t_id in t_ids:
+            closure.update(og.recursive_relationship(t_id, ["is_a", "part_of"]))
+        counts.update(closure)
+        labels.append(ontology_graph.most_specific_terms(
+            t_ids, og, sup_relations=["is_a", "part_of"]
+        ))
+    return counts
+
+
+def main():
+    ont_id = sys.argv[1] if len(sys.argv) > 1 else "1"
+    og = load(ont_id)[0]
+    rand = random.Random(0)
+    t_ids = sorted(og.id_to_term.keys())
+    n_samples = 100000
+    annotations = [
+        ("sample_%d" % i, rand.choice(t_ids))
+        for i in range(n_samples)
+        for _ in range(rand.randint(1, 5))
+    ]
+    print("%d samples, %d annotations" % (n_samples, len(annotations)))
+
+    start = time.perf_counter()
+    naive(og, annotations[:len(annotations) // 10])
+    elapsed = 10 * (time.perf_counter() - start)
+    print("naive loop (extrapolated from 10%%): %.2fs" % elapsed)
+
+    for processes in [None, 4]:
+        start = time.perf_counter()
+        AnnotationPropagator(og).run(annotations, processes=processes)
+        elapsed = time.perf_counter() - start
+        print("pipeline (processes=%s): %.2fs" % (processes, elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Measure subset and property-value queries on the attribute index against
+scanning 'Term.subsets' and 'Term.property_values'.
+
+Usage: python benchmarks/bench_attribute_index.py [ontology configuration ID]
+"""
+import sys
+import time
+
+from onto_lib.load_ontology import load
+
+DESC_RELATIONS = ["inv_is_a", "inv_part_of"]
+
+
+def scan_subset(og, subset):
+    return set(x for x, term in og.id_to_term.items() if subset in term.subsets)
+
+
+def scan_property(og, prop):
+    return set(
+        x
+        for x, term in og.id_to_term.items()
+        if any(p == prop for p, _ in term.property_values)
+    )
+
+
+def scan_descendants_in_subset(og, t_id, subset):
+    return set(
+        x
+        for x in og.recursive_relationship(t_id, DESC_RELATIONS)
+        if subset in og.id_to_term[x].subsets
+    )
+
+
+def _time(f, n_repeats):
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        res = f()
+    return (time.perf_counter() - start) / n_repeats, res
+
+
+def main():
+    ont_id = sys.argv[1] if len(sys.argv) > 1 else "1"
+    og = load(ont_id)[0]
+    start = time.perf_counter()
+    index = og.attribute_index()
+    print("%d terms, %d subsets, %d properties, index built in %.3fs"
+          % (len(og.id_to_term), len(index.subsets()), len(index.properties()),
+             time.perf_counter() - start))
+
+    n_repeats = 100
+    if index.subsets():
+        subset = max(index.subsets(), key=lambda x: len(index.subset_mask(x)))
+        t_idx, res_idx = _time(lambda: og.terms_in_subset(subset), n_repeats)
+        t_scan, res_scan = _time(lambda: scan_subset(og, subset), n_repeats)
+        assert res_idx == res_scan
+        print("terms in subset %s (%d): index %.3fms, scan %.3fms (%.0fx)"
+              % (subset, len(res_idx), 1000 * t_idx, 1000 * t_scan, t_scan / t_idx))
+
+        root_id = og.topological_order()[0]
+        t_idx, res_idx = _time(
+            lambda: og.terms_in_subset(
+                subset, within=og.closure_mask(root_id, DESC_RELATIONS)
+            ),
+            n_repeats
+        )
+        t_scan, res_scan = _time(
+            lambda: scan_descendants_in_subset(og, root_id, subset),
+            n_repeats
+        )
+        assert res_idx == res_scan
+        print("descendants of %s in subset: index %.3fms, scan %.3fms (%.1fx)"
+              % (root_id, 1000 * t_idx, 1000 * t_scan, t_scan / t_idx))
+
+    if index.properties():
+        prop = max(index.properties(), key=lambda x: len(index.property_mask(x)))
+        t_idx, res_idx = _time(lambda: og.terms_with_property(prop), n_repeats)
+        t_scan, res_scan = _time(lambda: scan_property(og, prop), n_repeats)
+        assert res_idx == res_scan
+        print("terms with property %s (%d): index %.3fms, scan %.3fms (%.0fx)"
+              % (prop, len(res_idx), 1000 * t_idx, 1000 * t_scan, t_scan / t_idx))
+
+
+if __name__ == "__main__":
+    main()
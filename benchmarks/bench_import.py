@@ -0,0 +1,35 @@
+"""
+Measure the wall-clock cost of importing onto_lib in a fresh interpreter.
+
+Usage: python benchmarks/bench_import.py [number of runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+STMT = "import onto_lib.load_ontology"
+
+
+def time_interpreter(stmt, n_runs):
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    times = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", stmt], cwd=root_dir, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    n_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    baseline = time_interpreter("pass", n_runs)
+    with_import = time_interpreter(STMT, n_runs)
+    print("interpreter startup: %.1fms" % (1000 * baseline))
+    print("startup + import onto_lib: %.1fms" % (1000 * with_import))
+    print("import cost: %.1fms" % (1000 * (with_import - baseline)))
+
+
+if __name__ == "__main__":
+    main()
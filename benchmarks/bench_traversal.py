@@ -0,0 +1,71 @@
+"""
+Measure recursive traversals over the interned integer adjacency against
+a breadth-first search over the string-keyed 'Term.relationships'.
+
+Usage: python benchmarks/bench_traversal.py [ontology configuration ID]
+"""
+import sys
+import time
+from collections import deque
+
+from onto_lib.load_ontology import load
+
+
+def string_recursive_relationship(og, t_id, relations):
+    gathered_ids = {t_id}
+    q = deque([t_id])
+    while q:
+        curr_id = q.popleft()
+        rels = og.id_to_term[curr_id].relationships
+        for rel in relations:
+            for rel_id in rels.get(rel, ()):
+                if rel_id not in gathered_ids and rel_id in og.id_to_term:
+                    gathered_ids.add(rel_id)
+                    q.append(rel_id)
+    return gathered_ids
+
+
+def main():
+    ont_id = sys.argv[1] if len(sys.argv) > 1 else "1"
+    og = load(ont_id)[0]
+    t_ids = sorted(og.id_to_term)
+    print("%d terms" % len(t_ids))
+
+    for relations in (["is_a", "part_of"], ["inv_is_a", "inv_part_of"]):
+        start = time.perf_counter()
+        for rel in relations:
+            og.adjacency(rel)
+        print("%s: adjacency built in %.3fs"
+              % (relations, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        n_int = sum(len(og.recursive_relationship(x, relations)) for x in t_ids)
+        int_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        n_str = sum(len(string_recursive_relationship(og, x, relations)) for x in t_ids)
+        str_elapsed = time.perf_counter() - start
+
+        assert n_int == n_str
+        print("%s: interned %.3fs, strings %.3fs (%.1fx), %d terms gathered"
+              % (relations, int_elapsed, str_elapsed,
+                 str_elapsed / int_elapsed, n_int))
+
+    n_repeats = 200
+    root_id = og.topological_order()[0]
+    relations = ["inv_is_a", "inv_part_of"]
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        og.recursive_relationship(root_id, relations, mappable_only=True)
+    int_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        og.filter_mappable(string_recursive_relationship(og, root_id, relations), True)
+    str_elapsed = time.perf_counter() - start
+    print("mappable descendants of %s: interned %.2fms, strings %.2fms (%.1fx)"
+          % (root_id, 1000 * int_elapsed / n_repeats,
+             1000 * str_elapsed / n_repeats, str_elapsed / int_elapsed))
+
+
+if __name__ == "__main__":
+    main()
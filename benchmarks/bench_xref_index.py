@@ -0,0 +1,57 @@
+"""
+Measure the throughput of bulk xref translation against a linear scan of
+'Term.xrefs'.
+
+Usage: python benchmarks/bench_xref_index.py [ontology configuration ID]
+"""
+import random
+import sys
+import time
+
+from onto_lib.load_ontology import load
+
+
+def scan_translate(og, xref):
+    return [
+        t_id
+        for t_id, term in og.id_to_term.items()
+        if term.xrefs and xref in term.xrefs
+    ]
+
+
+def main():
+    ont_id = sys.argv[1] if len(sys.argv) > 1 else "1"
+    og = load(ont_id)[0]
+    index = og.xref_index
+    known = list(index.xref_to_ids.keys())
+    print("%d terms, %d xrefs" % (len(og.id_to_term), len(known)))
+
+    rand = random.Random(0)
+    n_queries = 1000000
+    queries = [
+        rand.choice(known) if rand.random() < 0.8 else "UNKNOWN:%d" % i
+        for i in range(n_queries)
+    ]
+
+    start = time.perf_counter()
+    n_hits = sum(1 for _, t_ids in index.translate_many(queries) if t_ids)
+    elapsed = time.perf_counter() - start
+    print("translate_many: %d xrefs in %.3fs (%.0f xrefs/s, %d hits)"
+          % (n_queries, elapsed, n_queries / elapsed, n_hits))
+
+    start = time.perf_counter()
+    for _ in index.translate_many(queries, prefixes=["FMA", "BTO"]):
+        pass
+    elapsed = time.perf_counter() - start
+    print("translate_many with prefixes: %.0f xrefs/s" % (n_queries / elapsed))
+
+    n_scan = 200
+    start = time.perf_counter()
+    for xref in queries[:n_scan]:
+        scan_translate(og, xref)
+    elapsed = time.perf_counter() - start
+    print("linear scan: %.0f xrefs/s" % (n_scan / elapsed))
+
+
+if __name__ == "__main__":
+    main()
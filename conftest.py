@@ -0,0 +1,59 @@
+import pytest
+
+from onto_lib.ontology_graph import (
+    OntologyGraph, MappableOntologyGraph, Term, add_inverse_relationship_to_parents
+)
+
+
+def _toy_graph(relationships, names=None, subsets=None, property_values=None,
+               nonmappable_terms=None, mappable_only=False, id_to_typedef=None):
+    """
+    Build a small ontology graph by hand.
+    Args:
+        relationships: dictionary mapping each term ID to a dictionary
+            mapping relationship types to the IDs of the term's parents
+        names: optional dictionary mapping term IDs to names. By default,
+            a term's name is its lowercased ID.
+        subsets: optional dictionary mapping term IDs to their subsets
+        property_values: optional dictionary mapping term IDs to sets of
+            (property, value) tuples
+        nonmappable_terms: if supplied, a MappableOntologyGraph in which
+            these terms cannot be mapped to is built
+        mappable_only: see MappableOntologyGraph
+        id_to_typedef: optional dictionary mapping relation IDs to
+            Typedef objects
+    Returns:
+        the ontology graph, with inverse edges for every relationship type
+    """
+    names = names or {}
+    subsets = subsets or {}
+    property_values = property_values or {}
+    id_to_term = {
+        t_id: Term(
+            t_id,
+            names.get(t_id, t_id.lower()),
+            relationships={rel: list(x) for rel, x in rels.items()},
+            subsets=list(subsets.get(t_id, ())),
+            property_values=set(property_values.get(t_id, ()))
+        )
+        for t_id, rels in relationships.items()
+    }
+    relations = set(rel for rels in relationships.values() for rel in rels)
+    for term in list(id_to_term.values()):
+        for rel in [x for x in term.relationships if x in relations]:
+            add_inverse_relationship_to_parents(term, rel, "inv_%s" % rel, id_to_term)
+    if nonmappable_terms is None:
+        return OntologyGraph(id_to_term, id_to_typedef=id_to_typedef)
+    return MappableOntologyGraph(id_to_term, nonmappable_terms,
+                                 id_to_typedef=id_to_typedef,
+                                 mappable_only=mappable_only)
+
+
+@pytest.fixture
+def toy_graph():
+    """
+    Returns:
+        a function that builds a small ontology graph by hand. See
+        _toy_graph.
+    """
+    return _toy_graph
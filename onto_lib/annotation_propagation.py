@@ -0,0 +1,199 @@
+"""
+Propagate large tables of (sample, term) annotations through an ontology
+graph. Each sample is expanded to the ancestor closure of its terms, which
+is used to count the samples annotated with each term, and its terms are
+reduced to the most specific ones.
+
+Annotations are consumed as a stream and processed in chunks of samples,
+so memory is bounded by the chunk size and the ancestor cache rather than
+by the size of the input. Annotations of a given sample must be adjacent
+in the input, as they are in any table sorted by sample.
+"""
+from collections import Counter, deque
+from itertools import groupby
+
+DEFAULT_SUP_RELATIONS = ("is_a", "part_of")
+
+
+def read_annotations(annot_f, sep="\t"):
+    """
+    Stream annotations from a delimited file whose first two columns are
+    the sample and the term ID.
+    Args:
+        annot_f: file path to the annotations file
+        sep: column delimiter
+    Returns:
+        a generator of (sample, term ID) tuples
+    """
+    with open(annot_f, "r") as f:
+        for line in f:
+            tokens = line.rstrip("\n").split(sep)
+            if len(tokens) < 2:
+                continue
+            yield tokens[0], tokens[1]
+
+
+def iter_sample_chunks(annotations, chunk_size):
+    """
+    Args:
+        annotations: iterable of (sample, term ID) tuples, grouped by sample
+        chunk_size: maximum number of samples per chunk
+    Returns:
+        a generator of lists of (sample, list of term IDs) tuples
+    """
+    chunk = []
+    for sample, annots in groupby(annotations, key=lambda x: x[0]):
+        chunk.append((sample, [x[1] for x in annots]))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class AnnotationPropagator:
+    def __init__(self, og, sup_relations=DEFAULT_SUP_RELATIONS,
+                 cache_size=100000):
+        """
+        Args:
+            og: the ontology graph object
+            sup_relations: the relationship types through which to
+                define ancestors
+            cache_size: maximum number of terms whose ancestors are
+                cached between chunks
+        """
+        self.og = og
+        self.sup_relations = list(sup_relations)
+        self.cache_size = cache_size
+        self.term_counts = Counter()
+        self.n_samples = 0
+        self._term_to_sup_ids = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_term_to_sup_ids"] = {}
+        state["term_counts"] = Counter()
+        return state
+
+    def _superterms(self, t_ids):
+        """
+        Compute the strict ancestors of a batch of terms, using and
+        filling the ancestor cache.
+        """
+        cache = self._term_to_sup_ids
+        missing = [x for x in t_ids if x not in cache]
+        if len(cache) + len(missing) > self.cache_size:
+            cache.clear()
+            missing = list(t_ids)
+        for t_id in missing:
+            sup_ids = self.og.recursive_relationship(t_id, self.sup_relations)
+            sup_ids.discard(t_id)
+            cache[t_id] = frozenset(sup_ids)
+        return {x: cache[x] for x in t_ids}
+
+    def propagate_chunk(self, chunk):
+        """
+        Args:
+            chunk: list of (sample, list of term IDs) tuples
+        Returns:
+            a list of (sample, list of most specific term IDs) tuples, one
+            for each sample in the chunk, and a Counter mapping each term
+            ID to the number of samples in the chunk whose ancestor closure
+            contains the term
+        """
+        id_to_term = self.og.id_to_term
+        term_ids = set()
+        for _, t_ids in chunk:
+            term_ids.update(x for x in t_ids if x in id_to_term)
+        term_to_sup_ids = self._superterms(term_ids)
+
+        labels = []
+        counts = Counter()
+        for sample, t_ids in chunk:
+            t_ids = set(x for x in t_ids if x in id_to_term)
+            sup_ids = set()
+            for t_id in t_ids:
+                sup_ids.update(term_to_sup_ids[t_id])
+            counts.update(t_ids | sup_ids)
+            labels.append((sample, sorted(t_ids - sup_ids)))
+        return labels, counts
+
+    def _propagate_chunks(self, chunks, processes):
+        if not processes or processes < 2:
+            for chunk in chunks:
+                yield self.propagate_chunk(chunk)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+        max_pending = 2 * processes
+        with ProcessPoolExecutor(max_workers=processes,
+                                 initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_propagate_chunk_in_worker, chunk))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def propagate(self, annotations, chunk_size=10000, processes=None):
+        """
+        Propagate a stream of annotations. Per-term sample counts are
+        accumulated in 'term_counts' as the stream is consumed.
+        Args:
+            annotations: iterable of (sample, term ID) tuples, grouped
+                by sample
+            chunk_size: number of samples processed per batch
+            processes: number of worker processes. If None or 1, all
+                chunks are processed in the current process.
+        Returns:
+            a generator of (sample, list of most specific term IDs) tuples
+            in input order
+        """
+        chunks = iter_sample_chunks(annotations, chunk_size)
+        for labels, counts in self._propagate_chunks(chunks, processes):
+            self.term_counts.update(counts)
+            self.n_samples += len(labels)
+            for label in labels:
+                yield label
+
+    def run(self, annotations, labels_f=None, chunk_size=10000,
+            processes=None, sep="\t"):
+        """
+        Propagate a stream of annotations, optionally writing each sample's
+        most specific terms to a file.
+        Args:
+            annotations: iterable of (sample, term ID) tuples, grouped
+                by sample
+            labels_f: if supplied, file path of a delimited file to write
+                with one line per sample and its most specific terms
+            chunk_size: number of samples processed per batch
+            processes: number of worker processes
+            sep: column delimiter of the labels file
+        Returns:
+            a Counter mapping each term ID to the number of samples whose
+            ancestor closure contains the term
+        """
+        labels = self.propagate(annotations, chunk_size=chunk_size,
+                                processes=processes)
+        if labels_f is None:
+            for _ in labels:
+                pass
+        else:
+            with open(labels_f, "w") as f:
+                for sample, t_ids in labels:
+                    f.write("%s%s%s\n" % (sample, sep, ",".join(t_ids)))
+        return self.term_counts
+
+
+_worker_propagator = None
+
+
+def _init_worker(propagator):
+    global _worker_propagator
+    _worker_propagator = propagator
+
+
+def _propagate_chunk_in_worker(chunk):
+    return _worker_propagator.propagate_chunk(chunk)
@@ -0,0 +1,94 @@
+"""
+Inverted indexes from the subsets (e.g. 'uberon_slim') and property values
+(e.g. ('IAO:0000589', 'cell and encapsulating structures')) of the terms of
+an ontology graph to the terms that carry them.
+
+Each entry is stored as a sorted array of term indices, so that the index
+grows with the number of annotations rather than with the number of keys
+times the number of terms; most property values (e.g. editor notes) are
+carried by a single term. A query returns a Bitset over the graph's term
+index, so that it can be combined with other Bitsets, such as the mappable
+terms or the closure of a term. The Bitsets of dense entries are kept
+once built.
+"""
+from array import array
+
+from .bitset import Bitset
+
+# An entry's Bitset is kept once it is no larger than the entry's array
+# of 8-byte indices, i.e. if it holds at least 1 of every 64 terms
+DENSE_FRACTION = 1.0 / 64
+
+
+class AttributeIndex:
+    def __init__(self, id_to_term, term_ids, term_to_index):
+        """
+        Args:
+            id_to_term: dictionary mapping term IDs to Term objects
+            term_ids: the sorted list of term IDs of the term index
+            term_to_index: dictionary mapping each term ID to its index
+        """
+        subset_to_idxs = {}
+        prop_to_idxs = {}
+        prop_val_to_idxs = {}
+        for t_idx, t_id in enumerate(term_ids):
+            term = id_to_term[t_id]
+            for subset in term.subsets:
+                _append(subset_to_idxs, subset, t_idx)
+            props = set()
+            for prop, val in term.property_values:
+                if prop not in props:
+                    props.add(prop)
+                    _append(prop_to_idxs, prop, t_idx)
+                _append(prop_val_to_idxs, (prop, val), t_idx)
+
+        self.n_terms = len(term_ids)
+        self.subset_to_idxs = subset_to_idxs
+        self.prop_to_idxs = prop_to_idxs
+        self.prop_val_to_idxs = prop_val_to_idxs
+        self._dense_masks = {}
+
+    def subsets(self):
+        return set(self.subset_to_idxs.keys())
+
+    def properties(self):
+        return set(self.prop_to_idxs.keys())
+
+    def _mask(self, kind, key, idxs):
+        if idxs is None:
+            return Bitset(self.n_terms)
+        mask = self._dense_masks.get((kind, key))
+        if mask is None:
+            mask = Bitset.from_indices(self.n_terms, idxs)
+            if len(idxs) >= self.n_terms * DENSE_FRACTION:
+                self._dense_masks[(kind, key)] = mask
+        return mask
+
+    def subset_mask(self, subset):
+        """
+        Returns:
+            the Bitset of the terms in the subset
+        """
+        return self._mask("subset", subset, self.subset_to_idxs.get(subset))
+
+    def property_mask(self, prop, value=None):
+        """
+        Returns:
+            the Bitset of the terms with the property. If a value is
+            supplied, only terms with that value of the property are
+            included.
+        """
+        if value is None:
+            return self._mask("property", prop, self.prop_to_idxs.get(prop))
+        return self._mask(
+            "property_value", (prop, value),
+            self.prop_val_to_idxs.get((prop, value))
+        )
+
+
+def _append(key_to_idxs, key, t_idx):
+    idxs = key_to_idxs.get(key)
+    if idxs is None:
+        key_to_idxs[key] = array("l", [t_idx])
+    elif idxs[-1] != t_idx:
+        idxs.append(t_idx)
@@ -0,0 +1,95 @@
+"""
+A compact set of integer term indices backed by a bytearray with one bit
+per term. Membership tests and updates are O(1), and set operations
+between bitsets of the same size run in C over whole machine words.
+"""
+
+_BYTE_TO_BITS = [
+    tuple(i for i in range(8) if b >> i & 1)
+    for b in range(256)
+]
+
+
+class Bitset:
+    __slots__ = ("size", "bits")
+
+    def __init__(self, size, bits=None):
+        """
+        Args:
+            size: the number of indices the bitset can hold
+            bits: optional bytearray of packed bits, least significant
+                bit first
+        """
+        self.size = size
+        if bits is None:
+            bits = bytearray((size + 7) // 8)
+        self.bits = bits
+
+    @classmethod
+    def from_indices(cls, size, indices):
+        bitset = cls(size)
+        bits = bitset.bits
+        for i in indices:
+            bits[i >> 3] |= 1 << (i & 7)
+        return bitset
+
+    @classmethod
+    def full(cls, size):
+        bitset = cls(size, bytearray(b"\xff") * ((size + 7) // 8))
+        if size % 8:
+            bitset.bits[-1] = (1 << (size % 8)) - 1
+        return bitset
+
+    def add(self, i):
+        self.bits[i >> 3] |= 1 << (i & 7)
+
+    def discard(self, i):
+        self.bits[i >> 3] &= ~(1 << (i & 7)) & 0xff
+
+    def __contains__(self, i):
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def __iter__(self):
+        byte_to_bits = _BYTE_TO_BITS
+        for byte_idx, byte in enumerate(self.bits):
+            if byte:
+                base = byte_idx << 3
+                for bit in byte_to_bits[byte]:
+                    yield base + bit
+
+    def __len__(self):
+        return bin(self._as_int()).count("1")
+
+    def __bool__(self):
+        return any(self.bits)
+
+    def __eq__(self, other):
+        return isinstance(other, Bitset) and self.size == other.size and self.bits == other.bits
+
+    def __repr__(self):
+        return "Bitset(%d, %s)" % (self.size, list(self))
+
+    def _as_int(self):
+        return int.from_bytes(self.bits, "little")
+
+    def _from_int(self, value):
+        return Bitset(self.size, bytearray(value.to_bytes(len(self.bits), "little")))
+
+    def _check_size(self, other):
+        if self.size != other.size:
+            raise ValueError("Bitsets have different sizes: %d and %d" % (self.size, other.size))
+
+    def __and__(self, other):
+        self._check_size(other)
+        return self._from_int(self._as_int() & other._as_int())
+
+    def __or__(self, other):
+        self._check_size(other)
+        return self._from_int(self._as_int() | other._as_int())
+
+    def __sub__(self, other):
+        self._check_size(other)
+        return self._from_int(self._as_int() & ~other._as_int())
+
+    def copy(self):
+        return Bitset(self.size, bytearray(self.bits))
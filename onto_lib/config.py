@@ -1,16 +1,40 @@
-import pkg_resources as pr
+"""
+Locations of the resources bundled with onto_lib. Resource paths are
+resolved with importlib.resources on first use rather than at import.
+"""
+from functools import lru_cache
 from os.path import join
 import json
 
-resource_package = __name__
-OBO_DIR = pr.resource_filename(resource_package, "obo")
-PREFIX_TO_FNAME = pr.resource_filename(resource_package,
-                                       "ont_prefix_to_filename.json")
+# OBO_DIR and PREFIX_TO_FNAME are resolved by the module's __getattr__,
+# so they are left out of __all__
+__all__ = ["resource_filename", "ontology_name_to_location"]
+
+
+@lru_cache(maxsize=None)
+def resource_filename(name):
+    """
+    Args:
+        name: path of a resource relative to the onto_lib package
+            (e.g. 'obo' or 'metadata/term_to_extra_synonyms.json')
+    Returns:
+        the file system path of the resource
+    """
+    from importlib.resources import files
+    return str(files(__package__).joinpath(name))
+
+
+def __getattr__(name):
+    if name == "OBO_DIR":
+        return resource_filename("obo")
+    if name == "PREFIX_TO_FNAME":
+        return resource_filename("ont_prefix_to_filename.json")
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 def ontology_name_to_location():
     prefix_to_location = {}
-    with open(PREFIX_TO_FNAME, "r") as f:
+    with open(resource_filename("ont_prefix_to_filename.json"), "r") as f:
         for prefix, fname in json.load(f).items():
-            prefix_to_location[prefix] = join(OBO_DIR, fname)
+            prefix_to_location[prefix] = join(resource_filename("obo"), fname)
     return prefix_to_location
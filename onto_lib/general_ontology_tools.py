@@ -1,4 +1,5 @@
 from . import ontology_graph
+from .annotation_propagation import AnnotationPropagator
 
 
 def get_ontology_object(ont_id_to_og, ont_id="17"):
@@ -30,8 +31,8 @@ def get_term_name(term_id, ont_id_to_og, ont_id="17"):
 
 
 def get_term_name_and_synonyms(term_id,
-                               ont_id_to_og):
-    og = ont_id_to_og["17"]
+                               ont_id_to_og, ont_id="17"):
+    og = ont_id_to_og[ont_id]
     t_strs = set()
     term = og.id_to_term[term_id]
     t_strs.add(term.name)
@@ -40,7 +41,7 @@ def get_term_name_and_synonyms(term_id,
     return list(t_strs)
 
 
-def descendants(term_id, ont_id_to_og, ont_id="17"):
+def descendants(term_id, ont_id_to_og, ont_id="17", mappable_only=None):
     """
     Get the descendant terms for a given input term.
 
@@ -49,6 +50,8 @@ def descendants(term_id, ont_id_to_og, ont_id="17"):
     term_id: The ontology term ID.
     ont_id_to_og: The ontology graph ID map
     ont_id: The ontology ID
+    mappable_only: Only return terms that can be mapped to. If None,
+        the ontology graph's default is used.
 
     Returns
     ---------
@@ -57,11 +60,12 @@ def descendants(term_id, ont_id_to_og, ont_id="17"):
     og = ont_id_to_og[ont_id]
     return og.recursive_relationship(
         term_id,
-        recurs_relationships=['inv_is_a', 'inv_part_of']
+        recurs_relationships=['inv_is_a', 'inv_part_of'],
+        mappable_only=mappable_only
     )
 
 
-def ancestors(term_id, ont_id_to_og, ont_id="17"):
+def ancestors(term_id, ont_id_to_og, ont_id="17", mappable_only=None):
     """
     Get the ancestor terms for a given input term.
 
@@ -70,6 +74,8 @@ def ancestors(term_id, ont_id_to_og, ont_id="17"):
     term_id: The ontology term ID.
     ont_id_to_og: The ontology graph map.
     ont_id: The ontology ID.
+    mappable_only: Only return terms that can be mapped to. If None,
+        the ontology graph's default is used.
 
     Returns
     ---------
@@ -78,11 +84,12 @@ def ancestors(term_id, ont_id_to_og, ont_id="17"):
     og = ont_id_to_og[ont_id]
     return og.recursive_relationship(
         term_id,
-        recurs_relationships=['is_a', 'part_of']
+        recurs_relationships=['is_a', 'part_of'],
+        mappable_only=mappable_only
     )
 
 
-def most_specific_terms(term_ids, ont_id_to_og, ont_id="17"):
+def most_specific_terms(term_ids, ont_id_to_og, ont_id="17", mappable_only=None):
     """
     Filter a set of ontology terms to only their most specific terms.
     Parameters
@@ -90,6 +97,8 @@ def most_specific_terms(term_ids, ont_id_to_og, ont_id="17"):
     term_ids: A collection of term ID's to be filtered.
     ont_id_to_og: The ontology graph map.
     ont_id: The ontology ID
+    mappable_only: Only consider terms that can be mapped to. If None,
+        the ontology graph's default is used.
     Returns
     -------
     A collection of term ID's within `term_ids` that are most-specific.
@@ -101,11 +110,12 @@ def most_specific_terms(term_ids, ont_id_to_og, ont_id="17"):
     return ontology_graph.most_specific_terms(
         term_ids,
         og,
-        sup_relations=rels
+        sup_relations=rels,
+        mappable_only=mappable_only
     )
 
 
-def most_general_terms(term_ids, ont_id_to_og, ont_id="17"):
+def most_general_terms(term_ids, ont_id_to_og, ont_id="17", mappable_only=None):
     """
     Filter a set of ontology terms to only their most general terms.
     Parameters
@@ -113,6 +123,8 @@ def most_general_terms(term_ids, ont_id_to_og, ont_id="17"):
     term_ids: A collection of term ID's to be filtered.
     ont_id_to_og: The ontology graph map.
     ont_id: The ontology ID
+    mappable_only: Only consider terms that can be mapped to. If None,
+        the ontology graph's default is used.
     Returns
     -------
     A collection of term ID's within `term_ids` that are most general.
@@ -124,34 +136,82 @@ def most_general_terms(term_ids, ont_id_to_og, ont_id="17"):
     return ontology_graph.most_specific_terms(
         term_ids,
         og,
-        sup_relations=rels
+        sup_relations=rels,
+        mappable_only=mappable_only
     )
 
 
-def is_descendant(descendent, ancestor, ont_id_to_og):
-    og = ont_id_to_og["17"]
+def is_descendant(descendent, ancestor, ont_id_to_og, ont_id="17"):
+    og = ont_id_to_og[ont_id]
     sup_terms = og.recursive_relationship(
         descendent,
-        recurs_relationships=['is_a', 'part_of']
+        recurs_relationships=['is_a', 'part_of'],
+        mappable_only=False
     )
     return ancestor in set(sup_terms)
 
 
-def get_descendents_within_radius(term_id, ont_id_to_og, radius):
+def explain_descendant(descendent, ancestor, ont_id_to_og, ont_id="17", k=1):
+    """
+    Explain why one term is a descendant of another with the shortest
+    chains of 'is_a' and 'part_of' edges between them.
+
+    Parameters
+    ----------
+    descendent: The ontology term ID of the descendant.
+    ancestor: The ontology term ID of the ancestor.
+    ont_id_to_og: The ontology graph map.
+    ont_id: The ontology ID.
+    k: The number of paths to return.
+
+    Returns
+    -------
+    A list of at most k paths, shortest first. Each path is a list of
+    (term ID, relation, term ID) edges leading from the descendant to
+    the ancestor. The list is empty if the term is not a descendant.
+    """
+    og = ont_id_to_og[ont_id]
+    paths = og.path_index(['is_a', 'part_of'])
+    if k == 1:
+        path = paths.shortest_path(descendent, ancestor)
+        return [] if path is None else [path]
+    return paths.k_shortest_paths(descendent, ancestor, k)
+
+
+def explain_descendants(pairs, ont_id_to_og, ont_id="17"):
+    """
+    Explain a batch of (descendant, ancestor) pairs. See explain_descendant.
+
+    Returns
+    -------
+    A dictionary mapping each pair to the shortest path between its terms,
+    or to None if the first term is not a descendant of the second.
+    """
+    og = ont_id_to_og[ont_id]
+    return og.path_index(['is_a', 'part_of']).shortest_paths(pairs)
+
+
+def get_descendents_within_radius(term_id, ont_id_to_og, radius,
+                                  ont_id="17", mappable_only=None):
     return get_terms_within_radius(
         term_id,
         radius,
         relationships=['inv_is_a'],
-        ont_id_to_og=ont_id_to_og
+        ont_id_to_og=ont_id_to_og,
+        ont_id=ont_id,
+        mappable_only=mappable_only
     )
 
 
-def get_ancestors_within_radius(term_id, radius, ont_id_to_og):
+def get_ancestors_within_radius(term_id, radius, ont_id_to_og,
+                                ont_id="17", mappable_only=None):
     return get_terms_within_radius(
         term_id,
         radius,
         relationships=['is_a'],
-        ont_id_to_og=ont_id_to_og
+        ont_id_to_og=ont_id_to_og,
+        ont_id=ont_id,
+        mappable_only=mappable_only
     )
 
 
@@ -159,20 +219,196 @@ def get_terms_within_radius(
         term_id,
         radius,
         relationships,
-        ont_id_to_og
+        ont_id_to_og,
+        ont_id="17",
+        mappable_only=None
 ):
-    og = ont_id_to_og["17"]
-    result_terms = set()
-    next_batch = {term_id}
-    for i in range(radius):
-        new_next_batch = set()
-        for curr_t_id in next_batch:
-            curr_term = og.id_to_term[curr_t_id]
-            for rel in relationships:
-                if rel in curr_term.relationships:
-                    new_next_batch.update(
-                        curr_term.relationships[rel]
-                    )
-        result_terms.update(new_next_batch)
-        next_batch = new_next_batch
-    return result_terms
+    og = ont_id_to_og[ont_id]
+    return og.terms_within_radius(
+        term_id,
+        radius,
+        relationships,
+        mappable_only=mappable_only
+    )
+
+
+def get_term_ids_for_name(name, ont_id_to_og, ont_id="17", mappable_only=None):
+    """
+    Get the ID's of the terms with a given name.
+
+    Parameters
+    ----------
+    name: The term name.
+    ont_id_to_og: The ontology graph map.
+    ont_id: The ontology ID.
+    mappable_only: Only return terms that can be mapped to. If None,
+        the ontology graph's default is used.
+
+    Returns
+    -------
+    The set of term ID's.
+    """
+    og = ont_id_to_og[ont_id]
+    return og.term_ids_for_name(name, mappable_only=mappable_only)
+
+
+def translate_xrefs(xrefs, ont_id_to_og, ont_id="17", prefixes=None,
+                    mappable_only=None):
+    """
+    Translate external identifiers (e.g. 'FMA:54527') to the ontology
+    terms that cross-reference them.
+
+    Parameters
+    ----------
+    xrefs: An iterable of external identifiers.
+    ont_id_to_og: The ontology graph map.
+    ont_id: The ontology ID.
+    prefixes: If supplied, only translate identifiers with these ID
+        prefixes (e.g. ['FMA', 'UMLS_CUI']).
+    mappable_only: Only return terms that can be mapped to. If None,
+        the ontology graph's default is used.
+
+    Returns
+    -------
+    A dictionary mapping each external identifier to the list of term
+    ID's that cross-reference it.
+    """
+    og = ont_id_to_og[ont_id]
+    return {
+        xref: list(t_ids)
+        for xref, t_ids in og.xref_index.translate_many(
+            xrefs,
+            prefixes=prefixes,
+            mappable_only=mappable_only
+        )
+    }
+
+
+def get_term_xrefs(term_id, ont_id_to_og, ont_id="17", prefixes=None):
+    """
+    Get the external identifiers cross-referenced by a term.
+
+    Parameters
+    ----------
+    term_id: The ontology term ID.
+    ont_id_to_og: The ontology graph map.
+    ont_id: The ontology ID.
+    prefixes: If supplied, only return identifiers with these ID prefixes.
+
+    Returns
+    -------
+    A list of external identifiers.
+    """
+    og = ont_id_to_og[ont_id]
+    return list(og.xref_index.xrefs_of(term_id, prefixes=prefixes))
+
+
+def related_terms(term_id, relation, ont_id_to_og, ont_id="17", via=None,
+                  inverse=False, mappable_only=None):
+    """
+    Get the terms related to a given input term through a relation,
+    honoring the relation's transitivity, sub-relations, inverses and
+    property chains.
+
+    Parameters
+    ----------
+    term_id: The ontology term ID.
+    relation: The relation identifier (e.g. 'develops_from').
+    ont_id_to_og: The ontology graph map.
+    ont_id: The ontology ID.
+    via: Additional relations over which `relation` is treated as
+        transitive (e.g. ['part_of']).
+    inverse: If True, get the terms X for which 'X relation term_id'
+        holds.
+    mappable_only: Only return terms that can be mapped to. If None,
+        the ontology graph's default is used.
+
+    Returns
+    -------
+    The term ID's of the related terms.
+    """
+    og = ont_id_to_og[ont_id]
+    return og.related_terms(term_id, relation, via=via, inverse=inverse,
+                            mappable_only=mappable_only)
+
+
+def propagate_annotations(annotations, ont_id_to_og, ont_id="17",
+                          labels_f=None, chunk_size=10000, processes=None):
+    """
+    Expand a stream of (sample, term) annotations to the ancestors of each
+    sample's terms and reduce each sample to its most specific terms.
+
+    Parameters
+    ----------
+    annotations: An iterable of (sample, term ID) tuples grouped by sample.
+    ont_id_to_og: The ontology graph map.
+    ont_id: The ontology ID.
+    labels_f: If supplied, the file to which each sample's most specific
+        terms are written.
+    chunk_size: The number of samples processed per batch.
+    processes: The number of worker processes.
+
+    Returns
+    -------
+    A Counter mapping each term ID to the number of samples annotated
+    with the term or one of its descendants.
+    """
+    og = ont_id_to_og[ont_id]
+    propagator = AnnotationPropagator(og, sup_relations=['is_a', 'part_of'])
+    return propagator.run(annotations, labels_f=labels_f,
+                          chunk_size=chunk_size, processes=processes)
+
+
+def get_terms_in_subset(subset, ont_id_to_og, ont_id="17", descendant_of=None,
+                        mappable_only=None):
+    """
+    Get the terms in a subset (e.g. 'uberon_slim').
+
+    Parameters
+    ----------
+    subset: The subset name.
+    ont_id_to_og: The ontology graph map.
+    ont_id: The ontology ID.
+    descendant_of: If supplied, only return the terms that are this term
+        or its descendants.
+    mappable_only: Only return terms that can be mapped to. If None,
+        the ontology graph's default is used.
+
+    Returns
+    -------
+    The term ID's of the terms in the subset.
+    """
+    og = ont_id_to_og[ont_id]
+    within = None
+    if descendant_of is not None:
+        within = og.closure_mask(descendant_of, ['inv_is_a', 'inv_part_of'])
+    return og.terms_in_subset(subset, within=within, mappable_only=mappable_only)
+
+
+def get_terms_with_property(prop, ont_id_to_og, ont_id="17", value=None,
+                            descendant_of=None, mappable_only=None):
+    """
+    Get the terms with a property value.
+
+    Parameters
+    ----------
+    prop: The property (e.g. 'IAO:0000589').
+    ont_id_to_og: The ontology graph map.
+    ont_id: The ontology ID.
+    value: If supplied, only return the terms with this value of the
+        property.
+    descendant_of: If supplied, only return the terms that are this term
+        or its descendants.
+    mappable_only: Only return terms that can be mapped to. If None,
+        the ontology graph's default is used.
+
+    Returns
+    -------
+    The term ID's of the terms with the property.
+    """
+    og = ont_id_to_og[ont_id]
+    within = None
+    if descendant_of is not None:
+        within = og.closure_mask(descendant_of, ['inv_is_a', 'inv_part_of'])
+    return og.terms_with_property(prop, value=value, within=within,
+                                  mappable_only=mappable_only)
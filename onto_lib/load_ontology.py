@@ -1,15 +1,34 @@
-import pkg_resources as pr
 import json
+import threading
+from collections.abc import Mapping
 from . import config
 from . import ontology_graph
+from .ontology_views import OntologyView, ConsolidatedOntology
 
 
-def load(ontology_index):
-    resource_package = __name__
-    config_f = pr.resource_filename(resource_package, "ontology_configurations.json")
+def _read_configurations():
+    config_f = config.resource_filename("ontology_configurations.json")
     with open(config_f, "r") as f:
-        j = json.load(f)
-    ont_config = j[ontology_index]
+        return json.load(f)
+
+
+def load(ontology_index, ont_to_loc=None, progress=None, phase=None):
+    """
+    Load an ontology configuration.
+    Args:
+        ontology_index: the ontology configuration ID
+        ont_to_loc: optional dictionary mapping ontology prefixes (e.g.
+            'CL') to file paths of OBO files that replace the packaged
+            files, such as a newer release
+        progress: optional function called after each OBO file is parsed.
+            See ontology_graph.parse_obos.
+        phase: optional function returning a context manager for each
+            build phase. See ontology_graph.build_ontology.
+    Returns:
+        the ontology graph, the included ontology projects and the roots
+        of the graph, if it is restricted to subgraphs
+    """
+    ont_config = _read_configurations()[ontology_index]
 
     include_ontologies = ont_config["included_ontology_projects"]
     restrict_to_idspaces = ont_config["id_spaces"]
@@ -17,19 +36,240 @@ def load(ontology_index):
     restrict_to_roots = ont_config["subgraph_roots"] if is_restrict_roots else None
     exclude_terms = ont_config["exclude_terms"]
 
+    locations = config.ontology_name_to_location()
+    if ont_to_loc is not None:
+        locations.update(ont_to_loc)
     ont_to_loc = {x: y for x, y
-                  in config.ontology_name_to_location().items()
+                  in locations.items()
                   if x in include_ontologies}
     print(ont_to_loc)
     og = ontology_graph.build_ontology(ont_to_loc,
                                        restrict_to_idspaces=restrict_to_idspaces,
                                        include_obsolete=False,
                                        restrict_to_roots=restrict_to_roots,
-                                       exclude_terms=exclude_terms)
+                                       exclude_terms=exclude_terms,
+                                       progress=progress,
+                                       phase=phase)
 
     return og, include_ontologies, restrict_to_roots
 
 
+def load_consolidated(ontology_indices):
+    """
+    Load several ontology configurations over one consolidated graph,
+    parsing each ontology file only once.
+    Args:
+        ontology_indices: list of ontology configuration IDs
+    Returns:
+        a ConsolidatedOntology mapping each configuration ID to its
+        OntologyView
+    """
+    configs = _read_configurations()
+    ont_configs = {x: configs[x] for x in ontology_indices}
+
+    include_ontologies = set()
+    restrict_to_idspaces = set()
+    for ont_config in ont_configs.values():
+        include_ontologies.update(ont_config["included_ontology_projects"])
+        restrict_to_idspaces.update(ont_config["id_spaces"])
+
+    ont_to_loc = {x: y for x, y
+                  in config.ontology_name_to_location().items()
+                  if x in include_ontologies}
+    og = ontology_graph.build_ontology(ont_to_loc,
+                                       restrict_to_idspaces=sorted(restrict_to_idspaces),
+                                       include_obsolete=False,
+                                       record_sources=True)
+
+    ont_id_to_view = {}
+    for ont_id, ont_config in ont_configs.items():
+        is_restrict_roots = ont_config["restrict_to_specific_subgraph"]
+        ont_id_to_view[ont_id] = OntologyView(
+            og,
+            id_spaces=ont_config["id_spaces"],
+            restrict_to_roots=ont_config["subgraph_roots"] if is_restrict_roots else None,
+            exclude_terms=ont_config["exclude_terms"],
+            ontologies=ont_config["included_ontology_projects"]
+        )
+    return ConsolidatedOntology(og, ont_id_to_view)
+
+
+def _load_graph(ontology_index, ont_to_loc=None, progress=None):
+    return load(ontology_index, ont_to_loc=ont_to_loc, progress=progress)[0]
+
+
+class BackgroundLoader(Mapping):
+    """
+    Load ontology configurations on worker threads or processes, so that
+    the caller can go on, and queries against the configurations that are
+    already loaded can proceed, while others are parsed.
+
+    The loader maps configuration IDs to ontology graphs, so it can be
+    passed wherever the functions in general_ontology_tools expect
+    'ont_id_to_og'. Looking up a configuration that is still loading
+    waits for it. Reloading a configuration keeps serving the current
+    graph until the new one is built, and then swaps it in atomically.
+    """
+
+    def __init__(self, max_workers=None, processes=False):
+        """
+        Args:
+            max_workers: maximum number of configurations loaded at once
+            processes: if True, load on worker processes rather than
+                threads. Parsing then runs in parallel with the caller,
+                but progress is only reported when a load completes.
+        """
+        from concurrent import futures
+        if processes:
+            self._executor = futures.ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._processes = processes
+        self._lock = threading.Lock()
+        self._graphs = {}
+        self._pending = {}
+        self._errors = {}
+        self._progress = {}
+
+    def load(self, ontology_index, ont_to_loc=None):
+        """
+        Start loading, or reloading, a configuration in the background.
+        Args:
+            ontology_index: the ontology configuration ID
+            ont_to_loc: optional dictionary mapping ontology prefixes to
+                file paths of OBO files that replace the packaged files
+        Returns:
+            a Future of the configuration's new ontology graph
+        """
+        from concurrent import futures
+        loaded = futures.Future()
+        with self._lock:
+            self._progress[ontology_index] = {
+                "files_parsed": 0,
+                "n_files": None,
+                "terms_loaded": 0
+            }
+            if self._processes:
+                task = self._executor.submit(
+                    _load_graph, ontology_index, ont_to_loc
+                )
+            else:
+                task = self._executor.submit(
+                    _load_graph, ontology_index, ont_to_loc,
+                    self._progress_callback(ontology_index, loaded)
+                )
+            self._pending[ontology_index] = loaded
+        task.add_done_callback(
+            lambda f: self._finish(ontology_index, f, loaded)
+        )
+        return loaded
+
+    def _progress_callback(self, ontology_index, loaded):
+        def progress(ont, n_parsed, n_files, n_terms):
+            with self._lock:
+                if self._pending.get(ontology_index) is not loaded:
+                    return
+                self._progress[ontology_index] = {
+                    "files_parsed": n_parsed,
+                    "n_files": n_files,
+                    "terms_loaded": n_terms
+                }
+        return progress
+
+    def _finish(self, ontology_index, task, loaded):
+        error = task.exception()
+        with self._lock:
+            # A newer reload of the configuration supersedes this one
+            if self._pending.get(ontology_index) is loaded:
+                del self._pending[ontology_index]
+                if error is not None:
+                    self._errors[ontology_index] = error
+                else:
+                    og = task.result()
+                    self._graphs[ontology_index] = og
+                    self._errors.pop(ontology_index, None)
+                    self._progress[ontology_index]["terms_loaded"] = len(og.id_to_term)
+
+        # The graph is swapped in before anyone waiting on it is woken up
+        if error is not None:
+            loaded.set_exception(error)
+        else:
+            loaded.set_result(task.result())
+
+    def is_ready(self, ontology_index):
+        """
+        Returns:
+            whether a graph of the configuration can be queried without
+            waiting
+        """
+        return ontology_index in self._graphs
+
+    def is_loading(self, ontology_index):
+        return ontology_index in self._pending
+
+    def progress(self, ontology_index):
+        """
+        Returns:
+            a dictionary with the number of OBO files parsed
+            ('files_parsed') out of the number of files ('n_files'), the
+            number of terms parsed so far, or in the graph once it is
+            loaded ('terms_loaded'), and whether the configuration is
+            loaded ('ready') and still loading ('loading'). File counts
+            are None when loading on processes.
+        """
+        with self._lock:
+            prog = dict(self._progress[ontology_index])
+        prog["ready"] = self.is_ready(ontology_index)
+        prog["loading"] = self.is_loading(ontology_index)
+        return prog
+
+    def wait(self, ontology_indices=None, timeout=None):
+        """
+        Wait for pending loads to complete.
+        Args:
+            ontology_indices: the configurations to wait for. If None,
+                wait for all pending loads.
+            timeout: maximum number of seconds to wait
+        Returns:
+            True if none of the configurations is still loading
+        """
+        from concurrent import futures
+        with self._lock:
+            if ontology_indices is None:
+                pending = list(self._pending.values())
+            else:
+                pending = [
+                    self._pending[x]
+                    for x in ontology_indices
+                    if x in self._pending
+                ]
+        _, not_done = futures.wait(pending, timeout=timeout)
+        return not not_done
+
+    def __getitem__(self, ontology_index):
+        og = self._graphs.get(ontology_index)
+        if og is not None:
+            return og
+        future = self._pending.get(ontology_index)
+        if future is None:
+            if ontology_index in self._errors:
+                raise self._errors[ontology_index]
+            raise KeyError(ontology_index)
+        return future.result()
+
+    def __contains__(self, ontology_index):
+        return ontology_index in self._graphs or ontology_index in self._pending
+
+    def __iter__(self):
+        return iter(set(self._graphs) | set(self._pending))
+
+    def __len__(self):
+        return len(set(self._graphs) | set(self._pending))
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
 def main():
     og, i, r = load("4")
     return og.id_to_term["CVCL:C792"]
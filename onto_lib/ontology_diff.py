@@ -0,0 +1,330 @@
+"""
+Compare two releases of an ontology.
+
+Each release is reduced to a compact snapshot that keeps, for every term,
+only what is needed for comparison: its name, synonym strings, obsolete
+status and outgoing edges. OBO files are streamed stanza by stanza, so no
+Term objects or inverse edges are kept in memory for either release.
+"""
+import sys
+from collections import deque
+
+from . import ontology_graph
+
+DEFAULT_CLOSURE_RELATIONS = ("is_a", "part_of")
+
+
+class TermSnapshot:
+    __slots__ = ("name", "synonyms", "is_obsolete", "edges")
+
+    def __init__(self, name, synonyms, is_obsolete, edges):
+        """
+        Args:
+            name: name of term
+            synonyms: frozenset of synonym strings
+            is_obsolete: whether the term is obsolete
+            edges: frozenset of (relation, term ID) tuples
+        """
+        self.name = name
+        self.synonyms = synonyms
+        self.is_obsolete = is_obsolete
+        self.edges = edges
+
+
+def _snapshot_term(term, is_obsolete):
+    edges = frozenset(
+        (sys.intern(rel), sys.intern(rel_id))
+        for rel, rel_ids in term.relationships.items()
+        if not rel.startswith("inv_")
+        for rel_id in rel_ids
+    )
+    synonyms = frozenset(x.syn_str for x in term.synonyms)
+    return TermSnapshot(term.name, synonyms, is_obsolete, edges)
+
+
+def snapshot_obo(obo_files, restrict_to_idspaces=None):
+    """
+    Args:
+        obo_files: file path, or list of file paths, to OBO files
+        restrict_to_idspaces: list of ID prefixes of the terms to include
+    Returns:
+        a dictionary mapping each term ID, including obsolete terms, to
+        its TermSnapshot
+    """
+    if isinstance(obo_files, str):
+        obo_files = [obo_files]
+    id_to_snap = {}
+    for obo_file in obo_files:
+        for lines in ontology_graph.iter_obo_stanzas(obo_file):
+            entity = ontology_graph.parse_entity(lines, restrict_to_idspaces)
+            if entity and entity[0] == ontology_graph.ENTITY_TERM:
+                term = entity[1]
+                id_to_snap[sys.intern(term.id)] = _snapshot_term(term, entity[2])
+    return id_to_snap
+
+
+def snapshot_graph(og):
+    """
+    Args:
+        og: the ontology graph object
+    Returns:
+        a dictionary mapping each term ID to its TermSnapshot
+    """
+    return {
+        t_id: _snapshot_term(term, False)
+        for t_id, term in og.id_to_term.items()
+    }
+
+
+class OntologyDiff:
+    def __init__(self):
+        self.added = set()
+        self.removed = set()
+        self.obsoleted = set()
+        self.unobsoleted = set()
+        self.renamed = {}
+        self.synonyms_added = {}
+        self.synonyms_removed = {}
+        self.edges_added = {}
+        self.edges_removed = {}
+        self.closure_changed = set()
+
+    def __repr__(self):
+        return str(self.summary())
+
+    def summary(self):
+        """
+        Returns:
+            a dictionary mapping each kind of change to the number of
+            terms with that change
+        """
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "obsoleted": len(self.obsoleted),
+            "unobsoleted": len(self.unobsoleted),
+            "renamed": len(self.renamed),
+            "synonyms_added": len(self.synonyms_added),
+            "synonyms_removed": len(self.synonyms_removed),
+            "edges_added": len(self.edges_added),
+            "edges_removed": len(self.edges_removed),
+            "closure_changed": len(self.closure_changed)
+        }
+
+    def affected_terms(self, term_ids):
+        """
+        Determine which of a collection of terms, such as those used in
+        stored annotations, change meaning between the two releases.
+        Args:
+            term_ids: collection of term IDs
+        Returns:
+            a dictionary mapping each affected term ID to the list of
+            changes ('removed', 'obsoleted', 'renamed', 'closure_changed')
+            that affect it
+        """
+        affected = {}
+        for t_id in term_ids:
+            reasons = []
+            if t_id in self.removed:
+                reasons.append("removed")
+            if t_id in self.obsoleted:
+                reasons.append("obsoleted")
+            if t_id in self.renamed:
+                reasons.append("renamed")
+            if t_id in self.closure_changed:
+                reasons.append("closure_changed")
+            if reasons:
+                affected[t_id] = reasons
+        return affected
+
+
+def _to_snapshot(release, restrict_to_idspaces):
+    if isinstance(release, dict):
+        return release
+    if isinstance(release, ontology_graph.OntologyGraph):
+        return snapshot_graph(release)
+    return snapshot_obo(release, restrict_to_idspaces=restrict_to_idspaces)
+
+
+def _parents_map(id_to_snap, relations):
+    return {
+        t_id: [rel_id for rel, rel_id in snap.edges if rel in relations]
+        for t_id, snap in id_to_snap.items()
+        if any(rel in relations for rel, _ in snap.edges)
+    }
+
+
+def _children_map(parents):
+    children = {}
+    for t_id, par_ids in parents.items():
+        for par_id in par_ids:
+            if par_id not in children:
+                children[par_id] = []
+            children[par_id].append(t_id)
+    return children
+
+
+def _topological_order(t_ids, parents):
+    """
+    Order a set of terms so that each term comes after those of its
+    ancestors that are in the set. Terms on cycles are appended at the end.
+    """
+    n_parents = {
+        t_id: sum(1 for x in parents.get(t_id, ()) if x in t_ids)
+        for t_id in t_ids
+    }
+    children = {}
+    for t_id in t_ids:
+        for par_id in parents.get(t_id, ()):
+            if par_id in t_ids:
+                children.setdefault(par_id, []).append(t_id)
+    q = deque(sorted(x for x, n in n_parents.items() if n == 0))
+    order = []
+    while q:
+        t_id = q.popleft()
+        order.append(t_id)
+        for child_id in children.get(t_id, ()):
+            n_parents[child_id] -= 1
+            if n_parents[child_id] == 0:
+                q.append(child_id)
+    if len(order) < len(t_ids):
+        ordered = set(order)
+        order += sorted(x for x in t_ids if x not in ordered)
+    return order
+
+
+def _closure(t_id, parents, memo):
+    """
+    Gather the ancestors of a term, reusing the memoized ancestors of
+    any ancestor already computed.
+    """
+    gathered = set()
+    stack = list(parents.get(t_id, ()))
+    while stack:
+        par_id = stack.pop()
+        if par_id in gathered:
+            continue
+        gathered.add(par_id)
+        if par_id in memo:
+            gathered.update(memo[par_id])
+        else:
+            stack.extend(parents.get(par_id, ()))
+    closure = frozenset(gathered)
+    memo[t_id] = closure
+    return closure
+
+
+def _descendants(seeds, children):
+    gathered = set(seeds)
+    stack = list(seeds)
+    while stack:
+        t_id = stack.pop()
+        for child_id in children.get(t_id, ()):
+            if child_id not in gathered:
+                gathered.add(child_id)
+                stack.append(child_id)
+    return gathered
+
+
+def _compare_term(diff, t_id, old_term, new_term, closure_relations):
+    """
+    Record the changes to a term that is in both releases.
+    Returns:
+        whether the term's edges through the closure relations changed
+    """
+    if old_term.is_obsolete != new_term.is_obsolete:
+        if new_term.is_obsolete:
+            diff.obsoleted.add(t_id)
+        else:
+            diff.unobsoleted.add(t_id)
+    if old_term.name != new_term.name:
+        diff.renamed[t_id] = (old_term.name, new_term.name)
+    if old_term.synonyms != new_term.synonyms:
+        added = new_term.synonyms - old_term.synonyms
+        removed = old_term.synonyms - new_term.synonyms
+        if added:
+            diff.synonyms_added[t_id] = set(added)
+        if removed:
+            diff.synonyms_removed[t_id] = set(removed)
+    if old_term.edges == new_term.edges:
+        return False
+    added = new_term.edges - old_term.edges
+    removed = old_term.edges - new_term.edges
+    if added:
+        diff.edges_added[t_id] = set(added)
+    if removed:
+        diff.edges_removed[t_id] = set(removed)
+    return any(rel in closure_relations for rel, _ in added | removed)
+
+
+def _changed_closures(old_snap, new_snap, seeds, closure_relations):
+    """
+    Returns:
+        the set of IDs of the terms, non-obsolete in both releases, whose
+        ancestor closure changed. Only the seeds, whose edges through the
+        closure relations changed, and their descendants are compared.
+    """
+    old_parents = _parents_map(old_snap, closure_relations)
+    new_parents = _parents_map(new_snap, closure_relations)
+    candidates = _descendants(seeds, _children_map(old_parents))
+    candidates |= _descendants(seeds, _children_map(new_parents))
+    candidates = {
+        t_id
+        for t_id in candidates
+        if t_id in old_snap and t_id in new_snap
+        and not old_snap[t_id].is_obsolete and not new_snap[t_id].is_obsolete
+    }
+
+    old_memo = {}
+    new_memo = {}
+    for t_id in _topological_order(candidates, old_parents):
+        _closure(t_id, old_parents, old_memo)
+    return set(
+        t_id
+        for t_id in _topological_order(candidates, new_parents)
+        if old_memo[t_id] != _closure(t_id, new_parents, new_memo)
+    )
+
+
+def diff_ontologies(old, new, restrict_to_idspaces=None,
+                    closure_relations=DEFAULT_CLOSURE_RELATIONS):
+    """
+    Compare two releases of an ontology.
+    Args:
+        old: the old release. Either a file path or list of file paths to
+            OBO files, an ontology graph object, or a snapshot as returned
+            by snapshot_obo or snapshot_graph.
+        new: the new release, in any of the forms accepted for 'old'
+        restrict_to_idspaces: list of ID prefixes of the terms to compare
+            when reading OBO files
+        closure_relations: the relationship types through which ancestor
+            closures are computed
+    Returns:
+        an OntologyDiff object
+    """
+    old_snap = _to_snapshot(old, restrict_to_idspaces)
+    new_snap = _to_snapshot(new, restrict_to_idspaces)
+    closure_relations = set(closure_relations)
+    diff = OntologyDiff()
+
+    diff.added = set(new_snap.keys()) - set(old_snap.keys())
+    diff.removed = set(old_snap.keys()) - set(new_snap.keys())
+
+    # Terms whose edges through the closure relations changed. Only these
+    # terms and their descendants can have a changed ancestor closure.
+    seeds = set(diff.added) | diff.removed
+    for t_id, old_term in old_snap.items():
+        new_term = new_snap.get(t_id)
+        if new_term is not None and _compare_term(
+                diff, t_id, old_term, new_term, closure_relations):
+            seeds.add(t_id)
+    for t_id in diff.added:
+        if new_snap[t_id].edges:
+            diff.edges_added[t_id] = set(new_snap[t_id].edges)
+    for t_id in diff.removed:
+        if old_snap[t_id].edges:
+            diff.edges_removed[t_id] = set(old_snap[t_id].edges)
+
+    diff.closure_changed = _changed_closures(old_snap, new_snap, seeds,
+                                             closure_relations)
+    return diff
@@ -1,12 +1,16 @@
 #!/usr/bin/python
 import io
 import re
-from queue import Queue
-import pkg_resources as pr
+from contextlib import nullcontext
 from os.path import join
 import json
-
-resource_package = __name__
+from . import config
+from .xref_index import XrefIndex
+from .relation_closure import RelationClosure
+from .topology import TopologicalIndex
+from .path_index import PathIndex
+from .bitset import Bitset
+from .attribute_index import AttributeIndex
 
 ENTITY_TERM = "TERM"
 ENTITY_TYPE_DEF = "TYPE_DEF"
@@ -14,6 +18,8 @@ ENTITY_EXCLUDED_TERM = "EXCLUDED_TERM"
 
 VERBOSE = False
 
+DEFAULT_ORDER_RELATIONS = ("is_a", "part_of")
+
 
 class Synonym:
     """
@@ -88,10 +94,82 @@ class Term:
             return []
 
 
+class Typedef:
+    def __init__(self, relid, name, is_transitive=False, inverse_of=None,
+                 is_a=None, transitive_over=None, holds_over_chain=None):
+        """
+        Args:
+            relid: relation identifier (e.g. 'part_of')
+            name: name of relation
+            is_transitive: whether the relation is transitive
+            inverse_of: list of relation identifiers that are
+                inverses of this relation
+            is_a: list of relation identifiers of which this
+                relation is a sub-relation
+            transitive_over: list of relation identifiers over
+                which this relation is transitive
+            holds_over_chain: list of tuples of relation identifiers.
+                The relation holds between the ends of any chain of
+                edges with these types.
+        """
+        if inverse_of is None:
+            inverse_of = []
+        if is_a is None:
+            is_a = []
+        if transitive_over is None:
+            transitive_over = []
+        if holds_over_chain is None:
+            holds_over_chain = []
+        self.id = relid
+        self.name = name
+        self.is_transitive = is_transitive
+        self.inverse_of = inverse_of
+        self.is_a = is_a
+        self.transitive_over = transitive_over
+        self.holds_over_chain = holds_over_chain
+
+    def __repr__(self):
+        rep = {
+            "id": self.id,
+            "name": self.name,
+            "is_transitive": self.is_transitive,
+            "inverse_of": self.inverse_of,
+            "is_a": self.is_a,
+            "transitive_over": self.transitive_over,
+            "holds_over_chain": self.holds_over_chain}
+        return str(rep)
+
+
 class OntologyGraph:
-    def __init__(self, id_to_term):
+    def __init__(self, id_to_term, id_to_typedef=None, term_sources=None,
+                 alt_definitions=None):
+        """
+        Args:
+            id_to_term: dictionary mapping term IDs to Term objects
+            id_to_typedef: dictionary mapping relation IDs to Typedef
+                objects
+            term_sources: optional dictionary mapping each term ID to the
+                tuple of the ontology prefixes of the OBO files that
+                define the term, in the order they were parsed
+            alt_definitions: optional dictionary mapping the IDs of terms
+                defined in more than one file to a dictionary mapping the
+                prefix of each file whose definition was replaced by a
+                later file to that Term object
+        """
+        if id_to_typedef is None:
+            id_to_typedef = {}
         self.name_to_ids = None
         self.id_to_term = id_to_term
+        self.id_to_typedef = id_to_typedef
+        self.term_sources = term_sources
+        self.alt_definitions = alt_definitions
+        self._relation_closure = None
+        self._term_ids = None
+        self._term_to_index = None
+        self._adjacency = {}
+        self._attribute_index = None
+        self._topologies = {}
+        self._path_indexes = {}
 
     def subtype_names(self, supertype_name):
         ontid = self.name_to_ids[supertype_name]
@@ -110,29 +188,359 @@ class OntologyGraph:
     def recursive_superterms(self, ontid):
         return self.recursive_relationship(ontid, ["is_a"])
 
-    def recursive_relationship(self, t_id, recurs_relationships):
+    def recursive_relationship(self, t_id, recurs_relationships, mappable_only=None):
+        """
+        Gather the terms reachable from a term, including the term itself,
+        through any number of edges of the given relationship types.
+        """
+        if t_id not in self.id_to_term:
+            return set()
+        term_ids, term_to_index = self.term_index()
+        reached = self.reachable_indices(term_to_index[t_id], recurs_relationships)
+        mask = self.mappable_filter(mappable_only)
+        if mask is None:
+            return set(term_ids[x] for x in reached)
+        return set(term_ids[x] for x in reached if x in mask)
+
+    def reachable_indices(self, t_idx, relationships):
+        """
+        Args:
+            t_idx: the index of a term in the term index
+            relationships: the relationship types to follow
+        Returns:
+            the set of the indices of the terms reachable from the term,
+            including the term itself
+        """
+        adjs = [self.adjacency(x) for x in relationships]
+        members = self.member_mask()
+        visited = {t_idx}
+        stack = [t_idx]
+        while stack:
+            curr_idx = stack.pop()
+            for adj in adjs:
+                for rel_idx in adj[curr_idx]:
+                    if rel_idx not in visited:
+                        if members is not None and rel_idx not in members:
+                            continue
+                        visited.add(rel_idx)
+                        stack.append(rel_idx)
+        return visited
+
+    def closure_mask(self, t_id, relationships):
+        """
+        Returns:
+            the Bitset over the term index of the terms reachable from a
+            term, including the term itself, through any number of edges
+            of the given relationship types
+        """
+        term_ids, term_to_index = self.term_index()
+        if t_id not in self.id_to_term:
+            return Bitset(len(term_ids))
+        return Bitset.from_indices(
+            len(term_ids),
+            self.reachable_indices(term_to_index[t_id], relationships)
+        )
+
+    def mask_term_ids(self, mask, mappable_only=None):
+        """
+        Returns:
+            the set of IDs of the terms of the graph in a Bitset over the
+            term index
+        """
+        members = self.member_mask()
+        if members is not None:
+            mask = mask & members
+        mappable = self.mappable_filter(mappable_only)
+        if mappable is not None:
+            mask = mask & mappable
+        term_ids, _ = self.term_index()
+        return set(term_ids[x] for x in mask)
+
+    def attribute_index(self):
+        """
+        Returns:
+            the AttributeIndex of the terms' subsets and property values,
+            built on first use
+        """
+        if self._attribute_index is None:
+            term_ids, term_to_index = self.term_index()
+            self._attribute_index = AttributeIndex(
+                self.id_to_term, term_ids, term_to_index
+            )
+        return self._attribute_index
+
+    def terms_in_subset(self, subset, within=None, mappable_only=None):
+        """
+        Args:
+            subset: the subset name (e.g. 'uberon_slim')
+            within: optional Bitset over the term index, such as a
+                closure_mask, to which the result is restricted
+        Returns:
+            the set of IDs of the terms in the subset
+        """
+        mask = self.attribute_index().subset_mask(subset)
+        if within is not None:
+            mask = mask & within
+        return self.mask_term_ids(mask, mappable_only)
+
+    def terms_with_property(self, prop, value=None, within=None,
+                            mappable_only=None):
         """
-        To be used with caution?
+        Args:
+            prop: the property (e.g. 'IAO:0000589')
+            value: if supplied, only terms with this value of the property
+                are returned
+            within: optional Bitset over the term index, such as a
+                closure_mask, to which the result is restricted
+        Returns:
+            the set of IDs of the terms with the property
+        """
+        mask = self.attribute_index().property_mask(prop, value)
+        if within is not None:
+            mask = mask & within
+        return self.mask_term_ids(mask, mappable_only)
+
+    def terms_within_radius(self, t_id, radius, relationships, mappable_only=None):
+        """
+        Gather the terms reachable from a term through at most 'radius'
+        edges of the given relationship types.
         """
         if t_id not in self.id_to_term:
             return set()
-        gathered_ids = set()
-        curr_id = t_id
-        q = Queue()
-        q.put(curr_id)
-        visited_ids = set()
-        while not q.empty():
-            curr_id = q.get()
-            visited_ids.add(curr_id)
-            gathered_ids.add(curr_id)
-            for rel in recurs_relationships:
-                if curr_id not in self.id_to_term:
+        term_ids, term_to_index = self.term_index()
+        adjs = [self.adjacency(x) for x in relationships]
+        members = self.member_mask()
+        result_idxs = set()
+        next_batch = {term_to_index[t_id]}
+        for i in range(radius):
+            new_next_batch = set()
+            for curr_idx in next_batch:
+                for adj in adjs:
+                    new_next_batch.update(adj[curr_idx])
+            if members is not None:
+                new_next_batch = set(x for x in new_next_batch if x in members)
+            result_idxs.update(new_next_batch)
+            next_batch = new_next_batch
+        mask = self.mappable_filter(mappable_only)
+        return set(
+            term_ids[x]
+            for x in result_idxs
+            if mask is None or x in mask
+        )
+
+    def term_ids_for_name(self, name, mappable_only=None):
+        """
+        Returns:
+            the set of IDs of the terms with the given name
+        """
+        if self.name_to_ids is None:
+            name_to_ids = {}
+            for t_id, term in self.id_to_term.items():
+                if term.name not in name_to_ids:
+                    name_to_ids[term.name] = set()
+                name_to_ids[term.name].add(t_id)
+            self.name_to_ids = name_to_ids
+        return self.filter_mappable(self.name_to_ids.get(name, set()), mappable_only)
+
+    def member_mask(self):
+        """
+        Returns:
+            the Bitset over the term index of the terms that belong to the
+            graph, or None if every term in the index belongs to it
+        """
+        return None
+
+    def mappable_filter(self, mappable_only=None):
+        """
+        Returns:
+            the Bitset over the term index of the terms that query results
+            should be restricted to, or None if results are unrestricted.
+            All terms of a plain OntologyGraph can be mapped to.
+        """
+        return None
+
+    def filter_mappable(self, t_ids, mappable_only=None):
+        """
+        Restrict a set of term IDs to those that can be mapped to, if
+        mappable_only (or, if None, the graph's default) says so.
+        """
+        mask = self.mappable_filter(mappable_only)
+        if mask is None:
+            return t_ids
+        _, term_to_index = self.term_index()
+        return {
+            x
+            for x in t_ids
+            if x in term_to_index and term_to_index[x] in mask
+        }
+
+    def related_terms(self, t_id, relation, via=None, inverse=False,
+                      mappable_only=None):
+        """
+        Gather all terms related to a term through a given relation,
+        honoring the relation's transitivity, sub-relations, inverses,
+        'transitive_over' relations and property chains as declared in
+        the ontology's [Typedef] stanzas. See RelationClosure.related.
+        """
+        if self._relation_closure is None:
+            self._relation_closure = RelationClosure(self)
+        return self.filter_mappable(
+            self._relation_closure.related(t_id, relation, via=via, inverse=inverse),
+            mappable_only
+        )
+
+    def term_index(self):
+        """
+        Returns:
+            the sorted list of term IDs, and a dictionary mapping each
+            term ID to its position in that list
+        """
+        if self._term_ids is None:
+            self._term_ids = sorted(self.id_to_term.keys())
+            self._term_to_index = {x: i for i, x in enumerate(self._term_ids)}
+        return self._term_ids, self._term_to_index
+
+    def adjacency(self, relation):
+        """
+        Returns:
+            a list mapping each term index to the tuple of the indices of
+            the terms it points to through the relationship type. It is
+            computed once per relationship type and cached, so the graph's
+            relationships must not change after it is first queried.
+        """
+        if relation not in self._adjacency:
+            term_ids, term_to_index = self.term_index()
+            id_to_term = self.id_to_term
+            self._adjacency[relation] = [
+                tuple(
+                    term_to_index[x]
+                    for x in id_to_term[t_id].relationships.get(relation, ())
+                    if x in term_to_index
+                )
+                for t_id in term_ids
+            ]
+        return self._adjacency[relation]
+
+    def topology(self, relations=DEFAULT_ORDER_RELATIONS):
+        """
+        Returns:
+            the TopologicalIndex of the graph formed by the given
+            relationship types, which point from a term to its parents.
+            The index is computed once per set of relations and cached.
+        """
+        key = tuple(sorted(relations))
+        if key not in self._topologies:
+            term_ids, _ = self.term_index()
+            members = self.member_mask()
+            adjs = [self.adjacency(x) for x in key]
+            parents = []
+            for t_idx in range(len(term_ids)):
+                if members is not None and t_idx not in members:
+                    parents.append([])
                     continue
-                if rel in self.id_to_term[curr_id].relationships:
-                    for rel_id in self.id_to_term[curr_id].relationships[rel]:
-                        if rel_id not in visited_ids:
-                            q.put(rel_id)
-        return gathered_ids
+                parents.append(sorted(set(
+                    x
+                    for adj in adjs
+                    for x in adj[t_idx]
+                    if members is None or x in members
+                )))
+            self._topologies[key] = TopologicalIndex(parents, members=members)
+        return self._topologies[key]
+
+    def topological_order(self, relations=DEFAULT_ORDER_RELATIONS):
+        """
+        Returns:
+            the list of all term IDs ordered so that every term comes
+            before its children
+        Raises:
+            ValueError: if the relations form a cycle
+        """
+        topo = self.topology(relations)
+        if not topo.is_acyclic():
+            raise ValueError(
+                "The relations %s form %d cycles. Use find_cycles to list them."
+                % (list(relations), len(topo.cycles))
+            )
+        term_ids, _ = self.term_index()
+        return [term_ids[x] for x in topo.order]
+
+    def find_cycles(self, relations=DEFAULT_ORDER_RELATIONS):
+        """
+        Returns:
+            a list of cycles, each a list of the term IDs of a strongly
+            connected set of terms
+        """
+        term_ids, _ = self.term_index()
+        return [
+            [term_ids[x] for x in cycle]
+            for cycle in self.topology(relations).cycles
+        ]
+
+    def term_depths(self, relations=DEFAULT_ORDER_RELATIONS):
+        """
+        Returns:
+            a dictionary mapping each term ID to the length of the longest
+            path from a root to the term. Terms on or below a cycle are
+            omitted.
+        """
+        topo = self.topology(relations)
+        term_ids, _ = self.term_index()
+        return {term_ids[x]: topo.depth[x] for x in topo.order}
+
+    def term_heights(self, relations=DEFAULT_ORDER_RELATIONS):
+        """
+        Returns:
+            a dictionary mapping each term ID to the length of the longest
+            path from the term to a leaf. Terms on or below a cycle are
+            omitted.
+        """
+        topo = self.topology(relations)
+        term_ids, _ = self.term_index()
+        return {term_ids[x]: topo.height[x] for x in topo.order}
+
+    def aggregate(self, values, combine, relations=DEFAULT_ORDER_RELATIONS,
+                  bottom_up=True, default=None):
+        """
+        Propagate values through the graph in a single pass over its
+        topological order. For example, with bottom_up=True and
+        combine=max, each term receives the maximum value over itself
+        and its descendants.
+        Args:
+            values: dictionary mapping term IDs to their initial values
+            combine: function taking the accumulated value of a term and
+                the value of one of its children (bottom-up) or parents
+                (top-down) and returning the new accumulated value
+            relations: the relationship types that point from a term to
+                its parents
+            bottom_up: if True, values flow from children to parents.
+                Otherwise, values flow from parents to children.
+            default: the initial value of terms not in 'values'
+        Returns:
+            a dictionary mapping each term ID to its accumulated value
+        """
+        topo = self.topology(relations)
+        term_ids, _ = self.term_index()
+        state = topo.aggregate(
+            [values.get(x, default) for x in term_ids],
+            combine,
+            bottom_up=bottom_up
+        )
+        members = self.member_mask()
+        if members is None:
+            return dict(zip(term_ids, state))
+        return {term_ids[x]: state[x] for x in members}
+
+    def path_index(self, relations=DEFAULT_ORDER_RELATIONS):
+        """
+        Returns:
+            the PathIndex for path queries over the given relationship
+            types, which point from a term to its parents. The index is
+            computed once per set of relations and cached.
+        """
+        key = tuple(sorted(relations))
+        if key not in self._path_indexes:
+            self._path_indexes[key] = PathIndex(self, key)
+        return self._path_indexes[key]
 
 
 def empty_list():
@@ -141,91 +549,163 @@ def empty_list():
 
 class MappableOntologyGraph(OntologyGraph):
 
-    def __init__(self, id_to_term, nonmappable_terms):
-        OntologyGraph.__init__(self, id_to_term)
+    def __init__(self, id_to_term, nonmappable_terms, id_to_typedef=None,
+                 mappable_only=False, term_sources=None, alt_definitions=None):
+        OntologyGraph.__init__(self, id_to_term, id_to_typedef=id_to_typedef,
+                               term_sources=term_sources,
+                               alt_definitions=alt_definitions)
         """
         Args:
             nonmappable_terms: collection of term IDs that cannot
                 be mapped to
+            mappable_only: whether queries return only terms that can
+                be mapped to when they are not told otherwise
         """
         if not nonmappable_terms:
             self.nonmappable_terms = set()
         else:
             self.nonmappable_terms = set(nonmappable_terms)
-        self.mappable_term_ids = set(list(self.id_to_term.keys())).difference(self.nonmappable_terms)
+        self.mappable_only = mappable_only
+
+        # Mappability is stored as one bit per term over the term index
+        term_ids, term_to_index = self.term_index()
+        self.mappable_mask = Bitset.full(len(term_ids))
+        for t_id in self.nonmappable_terms:
+            if t_id in term_to_index:
+                self.mappable_mask.discard(term_to_index[t_id])
+        self._mappable_term_ids = None
+        self._mappable_terms = None
+        self.xref_index = XrefIndex(self.id_to_term, self.nonmappable_terms, og=self)
+
+    @property
+    def mappable_term_ids(self):
+        if self._mappable_term_ids is None:
+            term_ids, _ = self.term_index()
+            self._mappable_term_ids = set(term_ids[x] for x in self.mappable_mask)
+        return self._mappable_term_ids
+
+    def is_mappable(self, t_id):
+        _, term_to_index = self.term_index()
+        return t_id in term_to_index and term_to_index[t_id] in self.mappable_mask
+
+    def mappable_filter(self, mappable_only=None):
+        if mappable_only is None:
+            mappable_only = self.mappable_only
+        return self.mappable_mask if mappable_only else None
 
     def get_mappable_term_ids(self):
         return self.mappable_term_ids
 
     def get_mappable_terms(self):
-        return [y
-                for x, y in self.id_to_term.items()
-                if x not in self.nonmappable_terms
-                ]
+        if self._mappable_terms is None:
+            term_ids, _ = self.term_index()
+            self._mappable_terms = [
+                self.id_to_term[term_ids[x]]
+                for x in self.mappable_mask
+            ]
+        return self._mappable_terms
 
 
 def build_ontology(ont_to_loc, restrict_to_idspaces=None,
                    include_obsolete=False, restrict_to_roots=None,
-                   exclude_terms=None):
+                   exclude_terms=None, record_sources=False,
+                   progress=None, phase=None):
+    """
+    Build the ontology graph of one or more OBO files. See parse_obos for
+    the arguments shared with it.
+    Args:
+        restrict_to_roots: collection of root term IDs. If supplied, only
+            the roots and their 'is_a' descendants are kept.
+        exclude_terms: collection of term IDs that cannot be mapped to
+        phase: optional function taking the name of a build phase (e.g.
+            'parse_obo:CL' or 'root_restriction') and returning a context
+            manager that is entered for the duration of the phase. It is
+            used to profile the build.
+    """
     og = parse_obos(ont_to_loc,
                     restrict_to_idspaces=restrict_to_idspaces,
-                    include_obsolete=include_obsolete)
-
-    # Add enriched synonyms
-    cvcl_syns_f = pr.resource_filename(
-        resource_package,
-        join("metadata", "term_to_extra_synonyms.json")
-    )
-    with open(cvcl_syns_f, "r") as f:
-        term_to_syns = json.load(f)
-    for term in list(og.id_to_term.values()):
-        if term.id in term_to_syns:
-            for syn in term_to_syns[term.id]:
-                term.synonyms.add(Synonym(syn, "ENRICHED"))
-
-    # Remove specified synonyms
-    term_to_remove_syns_f = pr.resource_filename(
-        resource_package,
-        join("metadata", "term_to_remove_synonyms.json")
-    )
-    with open(term_to_remove_syns_f, "r") as f:
-        term_remove_syns = json.load(f)
-    for t_id, rem_syn_data in term_remove_syns.items():
-        if t_id in og.id_to_term:
-            exclude_syns = set(rem_syn_data["exclude_synonyms"])
-            term = og.id_to_term[t_id]
-            term.synonyms = [
-                x
-                for x in term.synonyms
-                if x.syn_str not in exclude_syns
-            ]
+                    include_obsolete=include_obsolete,
+                    record_sources=record_sources,
+                    progress=progress,
+                    phase=phase)
+
+    with _phase(phase, "synonym_enrichment"):
+        # Add enriched synonyms
+        cvcl_syns_f = config.resource_filename(
+            join("metadata", "term_to_extra_synonyms.json")
+        )
+        with open(cvcl_syns_f, "r") as f:
+            term_to_syns = json.load(f)
+        for term in _all_definitions(og):
+            if term.id in term_to_syns:
+                for syn in term_to_syns[term.id]:
+                    term.synonyms.add(Synonym(syn, "ENRICHED"))
+
+        # Remove specified synonyms
+        term_to_remove_syns_f = config.resource_filename(
+            join("metadata", "term_to_remove_synonyms.json")
+        )
+        with open(term_to_remove_syns_f, "r") as f:
+            term_remove_syns = json.load(f)
+        for term in _all_definitions(og):
+            if term.id in term_remove_syns:
+                exclude_syns = set(term_remove_syns[term.id]["exclude_synonyms"])
+                term.synonyms = [
+                    x
+                    for x in term.synonyms
+                    if x.syn_str not in exclude_syns
+                ]
 
+    id_to_term = og.id_to_term
     if restrict_to_roots:
-        keep_ids = set()  # The IDs that we will keep
-
-        # Get the subterms of terms that we want to keep
-        for root_id in restrict_to_roots:
-            keep_ids.update(og.recursive_subterms(root_id))
+        with _phase(phase, "root_restriction"):
+            keep_ids = set()  # The IDs that we will keep
+
+            # Get the subterms of terms that we want to keep
+            for root_id in restrict_to_roots:
+                keep_ids.update(og.recursive_subterms(root_id))
+
+            # Build the ontology-graph object
+            id_to_term = {}
+            for t_id in keep_ids:
+                id_to_term[t_id] = og.id_to_term[t_id]
+
+                # Update the relationships between terms to remove dangling edges
+                for rel, rel_ids in og.id_to_term[t_id].relationships.items():
+                    og.id_to_term[t_id].relationships[rel] = [
+                        x
+                        for x in rel_ids
+                        if x in keep_ids
+                    ]
+
+    with _phase(phase, "graph_indexes"):
+        return MappableOntologyGraph(id_to_term, exclude_terms,
+                                     id_to_typedef=og.id_to_typedef,
+                                     term_sources=og.term_sources,
+                                     alt_definitions=og.alt_definitions)
+
+
+def _all_definitions(og):
+    """
+    Returns:
+        a list of the graph's Term objects, followed by the definitions
+        of its terms that were replaced by a later file, if they were
+        recorded
+    """
+    terms = list(og.id_to_term.values())
+    if og.alt_definitions:
+        for ont_to_term in og.alt_definitions.values():
+            terms.extend(ont_to_term.values())
+    return terms
 
-        # Build the ontology-graph object
-        id_to_term = {}
-        for t_id in keep_ids:
-            id_to_term[t_id] = og.id_to_term[t_id]
 
-            # Update the relationships between terms to remove dangling edges
-            for rel, rel_ids in og.id_to_term[t_id].relationships.items():
-                og.id_to_term[t_id].relationships[rel] = [
-                    x
-                    for x in rel_ids
-                    if x in keep_ids
-                ]
-
-        return MappableOntologyGraph(id_to_term, exclude_terms)
-    else:
-        return MappableOntologyGraph(og.id_to_term, exclude_terms)
+def _phase(phase, name):
+    if phase is None:
+        return nullcontext()
+    return phase(name)
 
 
-def most_specific_terms(term_ids, og, sup_relations=None):
+def most_specific_terms(term_ids, og, sup_relations=None, mappable_only=None):
     """
     Given a set of terms S, this method returns all terms that
     have no children in S.
@@ -234,42 +714,33 @@ def most_specific_terms(term_ids, og, sup_relations=None):
         og: the ontology graph object
         sup_relations: the relationship types through which
             to define children
+        mappable_only: only consider the terms in S that can be
+            mapped to. If None, the graph's default is used.
     """
 
     if sup_relations is None:
         sup_relations = ["is_a"]
 
     term_ids = set([x for x in term_ids if x in og.id_to_term])
+    term_ids = og.filter_mappable(term_ids, mappable_only)
 
     if len(term_ids) < 1:
         return term_ids
 
-    terms = [og.id_to_term[x] for x in term_ids]
-    spec_term_lst = []
-    # Map terms to superterms
-    term_id_to_superterm_ids = {}
-    for term in terms:
-        term_id_to_superterm_ids[term.id] = og.recursive_relationship(term.id, sup_relations)
-
-    # Create "more-general-than" tree
-    have_relations = set()
-    more_general_than = {}
-    for term_a in list(term_id_to_superterm_ids.keys()):
-        for term_b, b_superterms in term_id_to_superterm_ids.items():
-            if term_a == term_b:
-                continue
-            if term_a in b_superterms:
-                if term_a not in list(more_general_than.keys()):
-                    more_general_than[term_a] = []
-                more_general_than[term_a].append(term_b)
-                have_relations.update([term_a, term_b])
-
-    # Collect leaves of the tree
-    for subs in list(more_general_than.values()):
-        for s in subs:
-            if s not in list(more_general_than.keys()):
-                spec_term_lst.append(s)
-    return list(set(spec_term_lst + list(set(term_ids) - have_relations)))  # TODO Clean this up
+    # A term is most specific unless it is a strict superterm of
+    # another term in S
+    _, term_to_index = og.term_index()
+    term_idxs = set(term_to_index[x] for x in term_ids)
+    more_general_idxs = set()
+    for t_idx in term_idxs:
+        sup_idxs = og.reachable_indices(t_idx, sup_relations)
+        sup_idxs.discard(t_idx)
+        more_general_idxs.update(sup_idxs & term_idxs)
+    return [
+        x
+        for x in term_ids
+        if term_to_index[x] not in more_general_idxs
+    ]
 
 
 def add_inverse_relationship_to_parents(term, relation, inverse_relation, id_to_term):
@@ -291,31 +762,96 @@ def add_inverse_relationship_to_parents(term, relation, inverse_relation, id_to_
                 del term.relationships[relation]
 
 
-def parse_obos(ont_to_loc, restrict_to_idspaces=None, include_obsolete=False):
+def parse_obos(ont_to_loc, restrict_to_idspaces=None, include_obsolete=False,
+               record_sources=False, progress=None, phase=None):
+    """
+    Parse and merge multiple OBO files.
+    Args:
+        ont_to_loc: dictionary mapping ontology prefixes (e.g. 'CL') to
+            file paths of OBO files
+        restrict_to_idspaces: list of ID prefixes of the terms to include
+        include_obsolete: Include obsolete terms?
+        record_sources: whether to record the files that define each
+            term, and the definitions replaced by later files, as the
+            graph's 'term_sources' and 'alt_definitions'. If a term is
+            defined in more than one file, the definition from the last
+            file is kept either way.
+        progress: optional function called after each OBO file is parsed
+            with the file's ontology prefix, the number of files parsed so
+            far, the number of files and the number of terms loaded so far
+        phase: optional function taking the name of a parse phase and
+            returning a context manager entered for its duration. See
+            build_ontology.
+    """
     id_to_term = {}
     name_to_ids = {}
+    id_to_typedef = {}
+    term_sources = {} if record_sources else None
+    alt_definitions = {} if record_sources else None
+    # Terms defined by the same files share one tuple of prefixes
+    shared_sources = {}
 
     # Iterate through OBO files and build up the ontology
-    for ont, loc in ont_to_loc.items():
-        i_to_t, n_to_is = parse_obo(loc,
-                                    restrict_to_idspaces=restrict_to_idspaces,
-                                    include_obsolete=include_obsolete)
+    for n_parsed, (ont, loc) in enumerate(ont_to_loc.items(), 1):
+        with _phase(phase, "parse_obo:%s" % ont):
+            i_to_t, n_to_is = parse_obo(loc,
+                                        restrict_to_idspaces=restrict_to_idspaces,
+                                        include_obsolete=include_obsolete,
+                                        id_to_typedef=id_to_typedef)
+        if record_sources:
+            _record_sources(ont, i_to_t, id_to_term, term_sources,
+                            alt_definitions, shared_sources)
         id_to_term.update(i_to_t)
         for name, ids in n_to_is.items():
             if name not in name_to_ids:
                 name_to_ids[name] = ids
             else:
                 name_to_ids[name].update(ids)
+        if progress is not None:
+            progress(ont, n_parsed, len(ont_to_loc), len(id_to_term))
 
-    for term in list(id_to_term.values()):
-        add_inverse_relationship_to_parents(term, "is_a", "inv_is_a", id_to_term)
-        add_inverse_relationship_to_parents(term, "part_of", "inv_part_of", id_to_term)
+    with _phase(phase, "inverse_edges"):
+        add_inverse_relationships(id_to_term)
 
-    return OntologyGraph(id_to_term)
+    return OntologyGraph(id_to_term, id_to_typedef=id_to_typedef,
+                         term_sources=term_sources,
+                         alt_definitions=alt_definitions)
+
+
+def _record_sources(ont, i_to_t, id_to_term, term_sources, alt_definitions,
+                    shared_sources):
+    """
+    Record that the file of an ontology defines the terms in 'i_to_t',
+    before they replace the definitions in 'id_to_term'. Each replaced
+    definition is kept in 'alt_definitions', and terms defined by the
+    same files share one tuple of prefixes from 'shared_sources'.
+    """
+    for t_id in i_to_t:
+        sources = term_sources.get(t_id)
+        if sources is None:
+            sources = (ont,)
+        else:
+            alt_definitions.setdefault(t_id, {})[sources[-1]] = id_to_term[t_id]
+            sources = sources + (ont,)
+        term_sources[t_id] = shared_sources.setdefault(sources, sources)
+
+
+def add_inverse_relationships(id_to_term):
+    """
+    Create an inverse edge (e.g. 'inv_is_a') for every relationship type
+    between terms.
+    """
+    relations = set()
+    for term in id_to_term.values():
+        relations.update(term.relationships.keys())
+    for term in list(id_to_term.values()):
+        for rel in [x for x in term.relationships if x in relations]:
+            add_inverse_relationship_to_parents(term, rel, "inv_%s" % rel, id_to_term)
 
 
 def process_chunk_of_lines(curr_lines, restrict_to_idspaces,
-                           name_to_ids, id_to_term, include_obsolete):
+                           name_to_ids, id_to_term, include_obsolete,
+                           id_to_typedef=None):
     entity = parse_entity(curr_lines, restrict_to_idspaces)
     if not entity:
         if VERBOSE:
@@ -328,9 +864,15 @@ def process_chunk_of_lines(curr_lines, restrict_to_idspaces,
             if term.name not in name_to_ids:
                 name_to_ids[term.name] = set()
             name_to_ids[term.name].add(term.id)
+    elif entity[0] == ENTITY_TYPE_DEF and entity[1] is not None:
+        typedef = entity[1]
+        is_obsolete = entity[2]
+        if id_to_typedef is not None and (not is_obsolete or include_obsolete):
+            id_to_typedef[typedef.id] = typedef
 
 
-def parse_obo(obo_file, restrict_to_idspaces=None, include_obsolete=False):
+def parse_obo(obo_file, restrict_to_idspaces=None, include_obsolete=False,
+              id_to_typedef=None):
     """
     Parse OBO file.
     Args:
@@ -341,39 +883,46 @@ def parse_obo(obo_file, restrict_to_idspaces=None, include_obsolete=False):
             will be included in the ontology. If this argument is None, then all
             terms  will be included.
         include_obsolete: Include obsolete terms?
+        id_to_typedef: if supplied, a dictionary that is updated with the
+            Typedef objects parsed from the file's [Typedef] stanzas
     """
 
-    header_info = {}
     print("Loading ontology from %s ..." % obo_file)
     name_to_ids = {}
     id_to_term = {}
+    for curr_lines in iter_obo_stanzas(obo_file):
+        process_chunk_of_lines(curr_lines, restrict_to_idspaces,
+                               name_to_ids, id_to_term, include_obsolete,
+                               id_to_typedef=id_to_typedef)
+
+    return id_to_term, name_to_ids
+
+
+def iter_obo_stanzas(obo_file):
+    """
+    Stream the stanzas (e.g. [Term] or [Typedef]) of an OBO file.
+    Args:
+        obo_file: file path to OBO file
+    Returns:
+        a generator of lists of the lines of each stanza. The header
+        of the file is skipped.
+    """
     with io.open(obo_file, "r", encoding="utf-8") as f:
-        # with open(obo_file, 'r') as f:
         for line in f:
             if not line.strip():
                 break  # Reached end of header
-            header_info[line.split(":")[0].strip()] = ":".join(line.split(":")[1:]).strip()
 
         curr_lines = []
         for line in f:
             if not line.strip():
                 if not curr_lines:  # nothing has been read yet
                     continue
-                process_chunk_of_lines(curr_lines, restrict_to_idspaces,
-                                       name_to_ids, id_to_term, include_obsolete)
+                yield curr_lines
                 curr_lines = []
             else:
                 curr_lines.append(line)
-        if curr_lines:  # process last chunk of lines at bottom of file
-            process_chunk_of_lines(curr_lines, restrict_to_idspaces,
-                                   name_to_ids, id_to_term, include_obsolete)
-
-        # Create inverse "is_a" and "part_of" edges between terms
-        # for term in id_to_term.values():
-        #    add_inverse_relationship_to_parents(term, "is_a", "inv_is_a")
-        #    add_inverse_relationship_to_parents(term, "part_of", "inv_part_of")
-
-    return id_to_term, name_to_ids
+        if curr_lines:  # last chunk of lines at bottom of file
+            yield curr_lines
 
 
 def parse_term_attrs(lines):
@@ -409,6 +958,8 @@ def parse_relationships(attrs, restrict_to_idspaces):
         for rel_raw in attrs["relationship"]:
             rel = rel_raw.split()[0]
             rel_term_id = rel_raw.split()[1]
+            if restrict_to_idspaces and rel_term_id.split(":")[0] not in restrict_to_idspaces:
+                continue
             if rel not in relationships:
                 relationships[rel] = []
             relationships[rel].append(rel_term_id)
@@ -512,6 +1063,48 @@ def parse_comment(attrs):
     return None
 
 
+def extract_relation_ids(raw_values):
+    """
+    Args:
+        raw_values: the values of a [Typedef] tag that refers to other
+            relations (e.g. 'part_of ! part of')
+    Returns:
+        the list of relation identifiers
+    """
+    return [x.split("!")[0].split()[0] for x in raw_values if x.split("!")[0].strip()]
+
+
+def extract_relation_chains(raw_chains):
+    """
+    Args:
+        raw_chains: the values of a 'holds_over_chain' or 'equivalent_to_chain'
+            tag (e.g. 'capable_of part_of {source="..."}')
+    Returns:
+        a list of tuples of relation identifiers
+    """
+    chains = []
+    for raw_chain in raw_chains:
+        chain = tuple(raw_chain.split("!")[0].split("{")[0].split())
+        if len(chain) > 1:
+            chains.append(chain)
+    return chains
+
+
+def parse_typedef(attrs):
+    is_transitive = "is_transitive" in attrs and attrs["is_transitive"][0] == "true"
+    chains = extract_relation_chains(attrs.get("holds_over_chain", []))
+    chains += extract_relation_chains(attrs.get("equivalent_to_chain", []))
+    return Typedef(
+        attrs["id"][0],
+        attrs["name"][0].strip() if "name" in attrs else attrs["id"][0],
+        is_transitive=is_transitive,
+        inverse_of=extract_relation_ids(attrs.get("inverse_of", [])),
+        is_a=extract_relation_ids(attrs.get("is_a", [])),
+        transitive_over=extract_relation_ids(attrs.get("transitive_over", [])),
+        holds_over_chain=chains
+    )
+
+
 def is_valid_term(attrs):
     if "name" not in attrs:
         return False
@@ -545,8 +1138,11 @@ def parse_entity(lines, restrict_to_idspaces):
 
         return ENTITY_TERM, term, is_obsolete
 
-    elif lines[0].strip() == "[Typedef]":  # TODO include type definitions at some point, if necesary
-        return ENTITY_TYPE_DEF, None, None
+    elif lines[0].strip() == "[Typedef]":
+        attrs = parse_term_attrs(lines)
+        if "id" not in attrs:
+            return "ERROR PARSING ENTITY", None
+        return ENTITY_TYPE_DEF, parse_typedef(attrs), parse_is_obsolete(attrs)
 
     else:
         if VERBOSE:
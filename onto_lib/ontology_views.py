@@ -0,0 +1,332 @@
+"""
+Serve several ontology configurations from one consolidated graph.
+
+The consolidated graph is the union of the configurations' ontologies and
+is loaded once. Each configuration is answered by an OntologyView, which
+shares the consolidated graph's terms and term index and only stores
+Bitsets of its member and mappable terms, so that serving many
+overlapping configurations takes about as much memory as the largest one.
+
+A view's members are the terms in its ID spaces that are defined in one
+of its ontologies' files, which, if the configuration restricts to
+subgraphs, are descendants of its roots through 'is_a' edges among such
+terms. If a term is defined in several files, a configuration loaded on
+its own keeps the definition from the last of its files, so a view whose
+files do not include the last file overall uses the definition from its
+own last file instead. Its queries only traverse edges between members,
+matching what build_ontology produces for the configuration on its own.
+Term objects are shared, however, so 'Term.relationships' read directly
+still lists edges to non-member terms, and inverse edges (e.g.
+'inv_is_a') of the consolidated graph.
+"""
+from collections import ChainMap
+from collections.abc import Mapping
+
+from .attribute_index import AttributeIndex
+from .bitset import Bitset
+from .ontology_graph import OntologyGraph, MappableOntologyGraph
+from .xref_index import XrefIndex, xref_prefix
+
+
+class MemberTerms(Mapping):
+    """
+    A read-only mapping of term IDs to Term objects, restricted to the
+    members of a view. 'overrides' maps the IDs of the members whose
+    definition differs from the consolidated graph's to their Term.
+    """
+
+    def __init__(self, id_to_term, term_ids, term_to_index, members,
+                 overrides=None):
+        self._id_to_term = id_to_term
+        self._overrides = overrides or {}
+        self._term_ids = term_ids
+        self._term_to_index = term_to_index
+        self._members = members
+        self._n_members = len(members)
+
+    def __contains__(self, t_id):
+        t_idx = self._term_to_index.get(t_id)
+        return t_idx is not None and t_idx in self._members
+
+    def __getitem__(self, t_id):
+        if t_id not in self:
+            raise KeyError(t_id)
+        term = self._overrides.get(t_id)
+        if term is None:
+            return self._id_to_term[t_id]
+        return term
+
+    def __iter__(self):
+        term_ids = self._term_ids
+        for t_idx in self._members:
+            yield term_ids[t_idx]
+
+    def __len__(self):
+        return self._n_members
+
+
+class ViewXrefIndex:
+    """
+    Answers xref queries for a view from the consolidated graph's
+    XrefIndex, restricting results to the view's terms. The xrefs of the
+    terms whose definition the view overrides are indexed separately.
+    """
+
+    def __init__(self, xref_index, view):
+        self.xref_index = xref_index
+        self.view = view
+        self.override_index = None
+        if view.overrides:
+            self.override_index = XrefIndex(view.overrides)
+
+    def _restrict(self, xref, t_ids, mappable_only):
+        if mappable_only is None:
+            mappable_only = self.view.mappable_only
+        if self.override_index is not None:
+            overrides = self.view.overrides
+            t_ids = sorted(
+                [x for x in t_ids if x not in overrides]
+                + list(self.override_index.translate(xref, mappable_only=False))
+            )
+        if mappable_only:
+            return tuple(x for x in t_ids if self.view.is_mappable(x))
+        return tuple(x for x in t_ids if x in self.view.id_to_term)
+
+    def xref_prefixes(self):
+        prefixes = self.xref_index.xref_prefixes()
+        if self.override_index is not None:
+            prefixes |= self.override_index.xref_prefixes()
+        return prefixes
+
+    def translate(self, xref, mappable_only=None):
+        return self._restrict(
+            xref,
+            self.xref_index.translate(xref, mappable_only=False),
+            mappable_only
+        )
+
+    def translate_many(self, xrefs, prefixes=None, mappable_only=None):
+        if prefixes is not None:
+            prefixes = set(prefixes)
+        for xref, t_ids in self.xref_index.translate_many(
+                xrefs, prefixes=prefixes, mappable_only=False):
+            if t_ids or (self.override_index is not None
+                         and xref in self.override_index
+                         and (prefixes is None or xref_prefix(xref) in prefixes)):
+                t_ids = self._restrict(xref, t_ids, mappable_only)
+            yield xref, t_ids
+
+    def xrefs_of(self, term_id, prefixes=None):
+        if term_id not in self.view.id_to_term:
+            return ()
+        if term_id in self.view.overrides:
+            return self.override_index.xrefs_of(term_id, prefixes=prefixes)
+        return self.xref_index.xrefs_of(term_id, prefixes=prefixes)
+
+
+class OntologyView(MappableOntologyGraph):
+
+    def __init__(self, base, id_spaces=None, restrict_to_roots=None,
+                 exclude_terms=None, mappable_only=False, ontologies=None):
+        """
+        Args:
+            base: the consolidated MappableOntologyGraph
+            id_spaces: list of ID prefixes of the view's terms. If None,
+                terms of all ID spaces are included.
+            restrict_to_roots: collection of root term IDs. If supplied,
+                only the roots and their 'is_a' descendants are included.
+            exclude_terms: collection of term IDs that cannot be mapped to
+            mappable_only: whether queries return only terms that can
+                be mapped to when they are not told otherwise
+            ontologies: list of the prefixes of the ontologies (e.g.
+                'CL') whose files the view's terms are defined in. If
+                None, terms defined in any file are included. Otherwise,
+                the base graph must have been built with
+                record_sources=True.
+        """
+        self.base = base
+        term_ids, term_to_index = base.term_index()
+        n_terms = len(term_ids)
+        if id_spaces is None:
+            members = Bitset.full(n_terms)
+        else:
+            id_spaces = set(id_spaces)
+            members = Bitset.from_indices(
+                n_terms,
+                (i for i, x in enumerate(term_ids) if x.split(":")[0] in id_spaces)
+            )
+        self.overrides = {}
+        if ontologies is not None:
+            if base.term_sources is None:
+                raise ValueError(
+                    "The base graph does not record the files that define "
+                    "its terms. Build it with record_sources=True."
+                )
+            members, self.overrides = self._defined_members(
+                set(ontologies), members
+            )
+
+        # The view shares the consolidated graph's terms, term index and
+        # Typedefs, so MappableOntologyGraph.__init__ is not called.
+        OntologyGraph.__init__(
+            self,
+            MemberTerms(base.id_to_term, term_ids, term_to_index, members,
+                        self.overrides),
+            id_to_typedef=base.id_to_typedef
+        )
+        if restrict_to_roots:
+            members = self._subgraph_members(restrict_to_roots, members)
+            self.id_to_term = MemberTerms(base.id_to_term, term_ids,
+                                          term_to_index, members, self.overrides)
+        self.members = members
+        if not exclude_terms:
+            self.nonmappable_terms = set()
+        else:
+            self.nonmappable_terms = set(exclude_terms)
+        self.mappable_only = mappable_only
+        self.mappable_mask = members.copy()
+        for t_id in self.nonmappable_terms:
+            if t_id in term_to_index:
+                self.mappable_mask.discard(term_to_index[t_id])
+        self._mappable_term_ids = None
+        self._mappable_terms = None
+        self.xref_index = ViewXrefIndex(base.xref_index, self)
+
+    def _defined_members(self, ontologies, candidates):
+        """
+        Returns:
+            the Bitset of the candidates defined in one of the ontologies'
+            files, and a dictionary mapping the IDs of those whose
+            definition in the base graph comes from another file to their
+            definition in the last of the ontologies' files
+        """
+        term_ids, _ = self.base.term_index()
+        term_sources = self.base.term_sources
+        alt_definitions = self.base.alt_definitions
+        members = Bitset(len(term_ids))
+        overrides = {}
+        # Terms defined by the same files share one tuple of prefixes, so
+        # the file each view takes a definition from is found once per tuple
+        sources_to_ont = {}
+        for t_idx in candidates:
+            t_id = term_ids[t_idx]
+            sources = term_sources[t_id]
+            if sources not in sources_to_ont:
+                sources_to_ont[sources] = next(
+                    (x for x in reversed(sources) if x in ontologies), None
+                )
+            ont = sources_to_ont[sources]
+            if ont is None:
+                continue
+            members.add(t_idx)
+            if ont != sources[-1]:
+                overrides[t_id] = alt_definitions[t_id][ont]
+        return members, overrides
+
+    def _subgraph_members(self, root_ids, candidates):
+        term_ids, term_to_index = self.base.term_index()
+        inv_is_a = self.adjacency("inv_is_a")
+        members = Bitset(len(term_ids))
+        stack = [
+            term_to_index[x]
+            for x in root_ids
+            if x in term_to_index and term_to_index[x] in candidates
+        ]
+        for t_idx in stack:
+            members.add(t_idx)
+        while stack:
+            t_idx = stack.pop()
+            for sub_idx in inv_is_a[t_idx]:
+                if sub_idx in candidates and sub_idx not in members:
+                    members.add(sub_idx)
+                    stack.append(sub_idx)
+        return members
+
+    def term_index(self):
+        return self.base.term_index()
+
+    def adjacency(self, relation):
+        """
+        Returns:
+            the base graph's adjacency list of the relationship type if
+            the view overrides no definitions. Otherwise, the edges of
+            overridden terms are replaced, and inverse relationship types
+            (e.g. 'inv_is_a') are computed by inverting their relationship
+            type, since the base graph's inverse edges come from the
+            definitions it keeps.
+        """
+        if not self.overrides:
+            return self.base.adjacency(relation)
+        if relation not in self._adjacency:
+            term_ids, term_to_index = self.term_index()
+            if relation.startswith("inv_"):
+                adj = [[] for _ in term_ids]
+                for t_idx, targets in enumerate(self.adjacency(relation[len("inv_"):])):
+                    for target_idx in targets:
+                        adj[target_idx].append(t_idx)
+                adj = [tuple(x) for x in adj]
+            else:
+                adj = list(self.base.adjacency(relation))
+                for t_id, term in self.overrides.items():
+                    adj[term_to_index[t_id]] = tuple(
+                        term_to_index[x]
+                        for x in term.relationships.get(relation, ())
+                        if x in term_to_index
+                    )
+            self._adjacency[relation] = adj
+        return self._adjacency[relation]
+
+    def attribute_index(self):
+        if not self.overrides:
+            return self.base.attribute_index()
+        if self._attribute_index is None:
+            term_ids, term_to_index = self.term_index()
+            self._attribute_index = AttributeIndex(
+                ChainMap(self.overrides, self.base.id_to_term),
+                term_ids, term_to_index
+            )
+        return self._attribute_index
+
+    def member_mask(self):
+        return self.members
+
+    def term_ids_for_name(self, name, mappable_only=None):
+        t_ids = self.base.term_ids_for_name(name, mappable_only=False)
+        t_ids = {
+            x
+            for x in t_ids
+            if x in self.id_to_term and x not in self.overrides
+        }
+        t_ids.update(
+            x
+            for x, term in self.overrides.items()
+            if term.name == name and x in self.id_to_term
+        )
+        return self.filter_mappable(t_ids, mappable_only)
+
+
+class ConsolidatedOntology(Mapping):
+    """
+    A read-only mapping of ontology configuration IDs to the OntologyView
+    of each configuration over one consolidated graph. It can be passed
+    wherever the functions in general_ontology_tools expect 'ont_id_to_og'.
+    """
+
+    def __init__(self, og, ont_id_to_view):
+        """
+        Args:
+            og: the consolidated MappableOntologyGraph
+            ont_id_to_view: dictionary mapping configuration IDs to
+                OntologyView objects over 'og'
+        """
+        self.og = og
+        self.ont_id_to_view = ont_id_to_view
+
+    def __getitem__(self, ont_id):
+        return self.ont_id_to_view[ont_id]
+
+    def __iter__(self):
+        return iter(self.ont_id_to_view)
+
+    def __len__(self):
+        return len(self.ont_id_to_view)
@@ -0,0 +1,282 @@
+"""
+Path queries between the terms of an ontology graph, used to explain why
+one term is related to another (e.g. the chain of 'is_a' and 'part_of'
+edges that makes one term a descendant of another).
+
+A path is a list of (term ID, relationship type, term ID) edges, each of
+which points from a term to one of its parents. The path from a term to
+itself is the empty list.
+"""
+from collections import deque
+from heapq import heappush, heappop
+
+
+class PathIndex:
+    def __init__(self, og, relations):
+        """
+        Args:
+            og: the ontology graph object
+            relations: the relationship types that point from a term to
+                its parents
+        """
+        self.relations = tuple(relations)
+        self.id_to_term = og.id_to_term
+        term_ids, term_to_index = og.term_index()
+        members = og.member_mask()
+        adjs = [(x, og.adjacency(x)) for x in self.relations]
+        parents = [() for _ in term_ids]
+        children = [[] for _ in term_ids]
+        for t_idx in range(len(term_ids)):
+            if members is not None and t_idx not in members:
+                continue
+            edges = tuple(
+                (rel, par_idx)
+                for rel, adj in adjs
+                for par_idx in adj[t_idx]
+                if members is None or par_idx in members
+            )
+            parents[t_idx] = edges
+            for rel, par_idx in edges:
+                children[par_idx].append((rel, t_idx))
+        self.term_ids = term_ids
+        self.term_to_index = term_to_index
+        self.parents = parents
+        self.children = children
+
+    def _index(self, t_id):
+        if t_id not in self.id_to_term:
+            return None
+        return self.term_to_index[t_id]
+
+    def _to_path(self, edges):
+        term_ids = self.term_ids
+        return [(term_ids[a], rel, term_ids[b]) for a, rel, b in edges]
+
+    def distances_to(self, target):
+        """
+        Returns:
+            a dictionary mapping the index of each term that has a path to
+            the target term to the length of its shortest path
+        """
+        t_idx = self._index(target)
+        if t_idx is None:
+            return {}
+        dist = {t_idx: 0}
+        q = deque([t_idx])
+        children = self.children
+        while q:
+            t_idx = q.popleft()
+            d = dist[t_idx] + 1
+            for _, child_idx in children[t_idx]:
+                if child_idx not in dist:
+                    dist[child_idx] = d
+                    q.append(child_idx)
+        return dist
+
+    def shortest_path(self, source, target):
+        """
+        Find a shortest path with a bidirectional breadth-first search,
+        which grows whichever of the two search frontiers is smaller.
+        Returns:
+            the path from the source to the target term, or None if there
+            is no path
+        """
+        s_idx = self._index(source)
+        t_idx = self._index(target)
+        if s_idx is None or t_idx is None:
+            return None
+        if s_idx == t_idx:
+            return []
+
+        # Each search maps the terms it has reached to the term it reached
+        # them from, the relationship type of the edge, and their distance
+        fwd = {s_idx: None}
+        bwd = {t_idx: None}
+        fwd_frontier = [s_idx]
+        bwd_frontier = [t_idx]
+        fwd_depth = 0
+        bwd_depth = 0
+        while fwd_frontier and bwd_frontier:
+            if len(fwd_frontier) <= len(bwd_frontier):
+                fwd_depth += 1
+                fwd_frontier, meets = _expand(
+                    fwd_frontier, fwd, bwd, self.parents, fwd_depth
+                )
+            else:
+                bwd_depth += 1
+                bwd_frontier, meets = _expand(
+                    bwd_frontier, bwd, fwd, self.children, bwd_depth
+                )
+            if meets:
+                meet = min(
+                    meets,
+                    key=lambda x: _depth(fwd[x]) + _depth(bwd[x])
+                )
+                return self._to_path(_join(meet, fwd, bwd))
+        return None
+
+    def shortest_paths(self, pairs):
+        """
+        Find shortest paths for a batch of (source, target) pairs. The
+        pairs are grouped by source, and the targets of each source are
+        answered with a single breadth-first search.
+        Returns:
+            a dictionary mapping each (source, target) pair to its path,
+            or to None if there is no path
+        """
+        source_to_targets = {}
+        for source, target in pairs:
+            if source not in source_to_targets:
+                source_to_targets[source] = set()
+            source_to_targets[source].add(target)
+
+        pair_to_path = {}
+        for source, targets in source_to_targets.items():
+            prev = self._bfs_parents(self._index(source), targets)
+            for target in targets:
+                t_idx = self._index(target)
+                if t_idx is None or t_idx not in prev:
+                    pair_to_path[(source, target)] = None
+                    continue
+                edges = []
+                while prev[t_idx] is not None:
+                    prev_idx, rel = prev[t_idx]
+                    edges.append((prev_idx, rel, t_idx))
+                    t_idx = prev_idx
+                edges.reverse()
+                pair_to_path[(source, target)] = self._to_path(edges)
+        return pair_to_path
+
+    def _bfs_parents(self, s_idx, targets):
+        """
+        Search breadth-first from a term along parent edges until all
+        targets are reached.
+        Returns:
+            a dictionary mapping the index of each reached term to the
+            index of the term and the relationship type it was reached
+            from, or to None for the source term itself
+        """
+        if s_idx is None:
+            return {}
+        remaining = set(
+            self._index(x)
+            for x in targets
+            if self._index(x) is not None
+        )
+        prev = {s_idx: None}
+        remaining.discard(s_idx)
+        q = deque([s_idx])
+        while q and remaining:
+            t_idx = q.popleft()
+            for rel, par_idx in self.parents[t_idx]:
+                if par_idx not in prev:
+                    prev[par_idx] = (t_idx, rel)
+                    remaining.discard(par_idx)
+                    q.append(par_idx)
+        return prev
+
+    def k_shortest_paths(self, source, target, k):
+        """
+        Find the k shortest paths that visit no term twice, with a
+        best-first search guided by each term's exact distance to the
+        target, so that no partial path is extended in vain.
+        Returns:
+            a list of at most k paths from the source to the target term,
+            shortest first
+        """
+        dist = self.distances_to(target)
+        s_idx = self._index(source)
+        if s_idx is None or s_idx not in dist:
+            return []
+        t_idx = self.term_to_index[target]
+        paths = []
+        counter = 0
+        heap = [(dist[s_idx], counter, s_idx, (s_idx,), ())]
+        while heap and len(paths) < k:
+            _, _, t_curr, nodes, edges = heappop(heap)
+            if t_curr == t_idx:
+                paths.append(self._to_path(edges))
+                continue
+            for rel, par_idx in self.parents[t_curr]:
+                if par_idx in dist and par_idx not in nodes:
+                    counter += 1
+                    heappush(heap, (
+                        len(edges) + 1 + dist[par_idx],
+                        counter,
+                        par_idx,
+                        nodes + (par_idx,),
+                        edges + ((t_curr, rel, par_idx),)
+                    ))
+        return paths
+
+    def all_paths(self, source, target, max_length=None):
+        """
+        Enumerate the paths that visit no term twice, in depth-first order.
+        Args:
+            max_length: if supplied, only paths with at most this many
+                edges are returned
+        Returns:
+            a generator of paths from the source to the target term
+        """
+        dist = self.distances_to(target)
+        s_idx = self._index(source)
+        if s_idx is None or s_idx not in dist:
+            return
+        if max_length is not None and dist[s_idx] > max_length:
+            return
+        t_idx = self.term_to_index[target]
+        stack = [(s_idx, (s_idx,), ())]
+        while stack:
+            t_curr, nodes, edges = stack.pop()
+            if t_curr == t_idx:
+                yield self._to_path(edges)
+                continue
+            for rel, par_idx in reversed(self.parents[t_curr]):
+                if par_idx not in dist or par_idx in nodes:
+                    continue
+                if max_length is not None and len(edges) + 1 + dist[par_idx] > max_length:
+                    continue
+                stack.append((
+                    par_idx,
+                    nodes + (par_idx,),
+                    edges + ((t_curr, rel, par_idx),)
+                ))
+
+
+def _depth(link):
+    return 0 if link is None else link[2]
+
+
+def _expand(frontier, visited, other, adjacency, depth):
+    """
+    Grow one side of a bidirectional search by one level.
+    Returns:
+        the new frontier, and the newly reached terms that the other
+        side has already reached
+    """
+    next_frontier = []
+    meets = []
+    for t_idx in frontier:
+        for rel, n_idx in adjacency[t_idx]:
+            if n_idx not in visited:
+                visited[n_idx] = (t_idx, rel, depth)
+                next_frontier.append(n_idx)
+                if n_idx in other:
+                    meets.append(n_idx)
+    return next_frontier, meets
+
+
+def _join(meet, fwd, bwd):
+    edges = []
+    t_idx = meet
+    while fwd[t_idx] is not None:
+        prev_idx, rel, _ = fwd[t_idx]
+        edges.append((prev_idx, rel, t_idx))
+        t_idx = prev_idx
+    edges.reverse()
+    t_idx = meet
+    while bwd[t_idx] is not None:
+        next_idx, rel, _ = bwd[t_idx]
+        edges.append((t_idx, rel, next_idx))
+        t_idx = next_idx
+    return edges
@@ -0,0 +1,324 @@
+"""
+Profile the memory used to build ontology configurations.
+
+Each configuration is built in a fresh subprocess, so that its peak
+resident set size (RSS) is not inflated by earlier builds. Allocations are
+traced with tracemalloc, and RSS is sampled from /proc/self/status on a
+background thread. Both are attributed to the phases of build_ontology:
+'parse_obo:<ontology>', 'inverse_edges', 'synonym_enrichment',
+'root_restriction' and 'graph_indexes'.
+
+The report is written as JSON. If a baseline report is supplied, peaks
+that grew by more than the tolerance are listed and the exit code is 1.
+
+Usage:
+    python -m onto_lib.profile_build 1 7 --output report.json
+    python -m onto_lib.profile_build 1 7 --baseline report.json --tolerance 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+
+# The metrics of a configuration, and of each of its phases, that are
+# compared against a baseline
+CONFIG_METRICS = ("peak_rss_kb", "peak_traced_bytes")
+PHASE_METRICS = ("traced_peak_bytes",)
+
+
+def read_rss_kb(field="VmRSS"):
+    """
+    Args:
+        field: the field of /proc/self/status to read. 'VmRSS' is the
+            current RSS and 'VmHWM' is the peak RSS of the process.
+    Returns:
+        the field's value in kB, or None if it is not available (e.g.
+        on systems without /proc)
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class RssSampler:
+    def __init__(self, interval=0.01):
+        """
+        Args:
+            interval: seconds between samples
+        """
+        self.interval = interval
+        self.peak_kb = None
+        self.phase_peak_kb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        rss_kb = read_rss_kb()
+        if rss_kb is None:
+            return None
+        if self.peak_kb is None or rss_kb > self.peak_kb:
+            self.peak_kb = rss_kb
+        if self.phase_peak_kb is None or rss_kb > self.phase_peak_kb:
+            self.phase_peak_kb = rss_kb
+        return rss_kb
+
+    def reset_phase(self):
+        self.phase_peak_kb = None
+        return self.sample()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+class BuildProfiler:
+    def __init__(self, trace_allocations=True, interval=0.01):
+        """
+        Args:
+            trace_allocations: whether to trace allocations with
+                tracemalloc, which slows the build down severalfold
+            interval: seconds between RSS samples
+        """
+        self.trace_allocations = trace_allocations
+        self.sampler = RssSampler(interval)
+        self.phases = []
+        self.peak_traced_bytes = None
+
+    def start(self):
+        if self.trace_allocations:
+            tracemalloc.start()
+            self.peak_traced_bytes = 0
+        self.sampler.start()
+
+    def stop(self):
+        self.sampler.stop()
+        if self.trace_allocations:
+            self._update_traced_peak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    def _update_traced_peak(self, peak):
+        self.peak_traced_bytes = max(self.peak_traced_bytes, peak)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measure a build phase. Passed as the 'phase' argument of
+        build_ontology.
+        """
+        if self.trace_allocations:
+            start_traced, peak = tracemalloc.get_traced_memory()
+            self._update_traced_peak(peak)
+            tracemalloc.reset_peak()
+        start_rss_kb = self.sampler.reset_phase()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {
+                "name": name,
+                "duration_s": time.perf_counter() - start,
+                "start_rss_kb": start_rss_kb,
+            }
+            self.sampler.sample()
+            record["rss_peak_kb"] = self.sampler.phase_peak_kb
+            if self.trace_allocations:
+                end_traced, peak = tracemalloc.get_traced_memory()
+                self._update_traced_peak(peak)
+                record["traced_peak_bytes"] = peak
+                record["traced_peak_growth_bytes"] = peak - start_traced
+                record["traced_net_bytes"] = end_traced - start_traced
+            self.phases.append(record)
+
+
+def profile_config(ont_id, trace_allocations=True, interval=0.01):
+    """
+    Build an ontology configuration in the current process and profile it.
+    Returns:
+        a dictionary with the configuration's number of terms, build
+        duration, peak RSS, peak traced memory, and per-phase records
+    """
+    from .load_ontology import load
+
+    profiler = BuildProfiler(trace_allocations=trace_allocations,
+                             interval=interval)
+    start_rss_kb = read_rss_kb()
+    start = time.perf_counter()
+    profiler.start()
+    # The build reports the files it reads on stdout, which is reserved
+    # for the profile
+    with redirect_stdout(sys.stderr):
+        og = load(ont_id, phase=profiler.phase)[0]
+    profiler.stop()
+    return {
+        "n_terms": len(og.id_to_term),
+        "duration_s": time.perf_counter() - start,
+        "start_rss_kb": start_rss_kb,
+        "peak_rss_kb": read_rss_kb("VmHWM"),
+        "peak_traced_bytes": profiler.peak_traced_bytes,
+        "phases": profiler.phases,
+    }
+
+
+def run_config(ont_id, trace_allocations=True, interval=0.01):
+    """
+    Profile an ontology configuration in a fresh subprocess.
+    Returns:
+        the profile of the configuration (see profile_config), or a
+        dictionary with an 'error' if the build failed
+    """
+    package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cmd = [
+        sys.executable, "-m", "onto_lib.profile_build", ont_id,
+        "--child", "--interval", str(interval)
+    ]
+    if not trace_allocations:
+        cmd.append("--no-tracemalloc")
+    res = subprocess.run(cmd, cwd=package_parent, stdout=subprocess.PIPE,
+                         stderr=subprocess.PIPE, universal_newlines=True)
+    if res.returncode != 0:
+        return {"error": res.stderr.strip().splitlines()[-1:]}
+    return json.loads(res.stdout)
+
+
+def compare_reports(report, baseline, tolerance):
+    """
+    Args:
+        report: the new profiling report
+        baseline: the baseline profiling report
+        tolerance: the allowed relative growth of each peak (e.g. 0.1
+            for 10%)
+    Returns:
+        a list of descriptions of the peaks that grew by more than the
+        tolerance
+    """
+    regressions = []
+
+    def check(label, new, old):
+        if new is None or not old:
+            return
+        if new > old * (1 + tolerance):
+            regressions.append(
+                "%s: %d -> %d (+%.1f%%)" % (label, old, new, 100.0 * (new - old) / old)
+            )
+
+    for ont_id, prof in report["configs"].items():
+        base_prof = baseline["configs"].get(ont_id)
+        if base_prof is None or "error" in prof or "error" in base_prof:
+            continue
+        for metric in CONFIG_METRICS:
+            check("config %s %s" % (ont_id, metric),
+                  prof.get(metric), base_prof.get(metric))
+        name_to_base_phase = {x["name"]: x for x in base_prof["phases"]}
+        for phase in prof["phases"]:
+            base_phase = name_to_base_phase.get(phase["name"])
+            if base_phase is None:
+                continue
+            for metric in PHASE_METRICS:
+                check("config %s phase %s %s" % (ont_id, phase["name"], metric),
+                      phase.get(metric), base_phase.get(metric))
+    return regressions
+
+
+def _summarize(report):
+    for ont_id, prof in report["configs"].items():
+        if "error" in prof:
+            sys.stderr.write("config %s: build failed: %s\n" % (ont_id, prof["error"]))
+            continue
+        line = "config %s: %d terms in %.2fs" % (
+            ont_id, prof["n_terms"], prof["duration_s"]
+        )
+        if prof["peak_rss_kb"] is not None:
+            line += ", peak RSS %.1f MB" % (prof["peak_rss_kb"] / 1024.0)
+        if prof["peak_traced_bytes"] is not None:
+            line += ", peak traced %.1f MB" % (prof["peak_traced_bytes"] / 1e6)
+            top = max(prof["phases"], key=lambda x: x["traced_peak_bytes"])
+            line += " (reached in %s)" % top["name"]
+        sys.stderr.write(line + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Profile the memory used to build ontology configurations."
+    )
+    parser.add_argument("configs", nargs="*",
+                        help="ontology configuration IDs (default: all)")
+    parser.add_argument("-o", "--output",
+                        help="file to write the JSON report to (default: stdout)")
+    parser.add_argument("--baseline",
+                        help="JSON report to compare the peaks against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed relative growth of each peak (default: 0.1)")
+    parser.add_argument("--interval", type=float, default=0.01,
+                        help="seconds between RSS samples (default: 0.01)")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="only sample RSS, which does not slow the build down")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    trace_allocations = not args.no_tracemalloc
+
+    if args.child:
+        prof = profile_config(args.configs[0], trace_allocations=trace_allocations,
+                              interval=args.interval)
+        json.dump(prof, sys.stdout)
+        return 0
+
+    configs = args.configs
+    if not configs:
+        from .load_ontology import _read_configurations
+        configs = sorted(_read_configurations().keys(), key=int)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tracemalloc": trace_allocations,
+        "configs": {},
+    }
+    for ont_id in configs:
+        report["configs"][ont_id] = run_config(
+            ont_id, trace_allocations=trace_allocations, interval=args.interval
+        )
+    _summarize(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if any("error" in x for x in report["configs"].values()):
+        return 2
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        for regression in regressions:
+            sys.stderr.write("regression: %s\n" % regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Relation-aware traversal of an ontology graph.
+
+A query for the terms related to a term through a relation R is answered
+with a single breadth-first search over the product of the ontology
+graph's adjacency lists and a small automaton that encodes which chains of edges entail R. The
+automaton is built from the ontology's [Typedef] stanzas and accounts for
+
+    - 'is_a' on either side of R (x is_a y, y R z entails x R z, and
+      x R y, y is_a z entails x R z)
+    - sub-relations of R (x S y with S is_a R entails x R y)
+    - inverses of R (y R' x with R' inverse_of R entails x R y)
+    - transitivity of R and relations that R is 'transitive_over'
+    - property chains declared with 'holds_over_chain' or
+      'equivalent_to_chain'
+"""
+from collections import deque
+
+PRE = 0
+POST = 1
+
+
+class RelationClosure:
+    def __init__(self, og):
+        """
+        Args:
+            og: the ontology graph object. Its adjacency lists must
+                include inverse edges (e.g. 'inv_part_of') for every
+                relationship type, as created by parse_obos. Traversal
+                runs over the graph's term indices and only visits the
+                terms in its member_mask.
+        """
+        self.og = og
+        self.id_to_typedef = og.id_to_typedef
+
+        # Map each relation to its direct sub-relations and inverses
+        self.rel_to_sub_rels = {}
+        self.rel_to_inverses = {}
+        for rel, typedef in self.id_to_typedef.items():
+            for sup_rel in typedef.is_a:
+                self.rel_to_sub_rels.setdefault(sup_rel, set()).add(rel)
+            for inv_rel in typedef.inverse_of:
+                self.rel_to_inverses.setdefault(rel, set()).add(inv_rel)
+                self.rel_to_inverses.setdefault(inv_rel, set()).add(rel)
+
+        self._sub_relations = {}
+        self._automata = {}
+
+    def sub_relations(self, relation):
+        """
+        Returns:
+            the set of relations that entail the given relation, including
+            the relation itself
+        """
+        if relation in self._sub_relations:
+            return self._sub_relations[relation]
+        gathered = {relation}
+        q = deque([relation])
+        while q:
+            rel = q.popleft()
+            for sub_rel in self.rel_to_sub_rels.get(rel, ()):
+                if sub_rel not in gathered:
+                    gathered.add(sub_rel)
+                    q.append(sub_rel)
+        self._sub_relations[relation] = gathered
+        return gathered
+
+    def is_transitive(self, relation):
+        if relation == "is_a":
+            return True
+        typedef = self.id_to_typedef.get(relation)
+        return typedef is not None and typedef.is_transitive
+
+    def _edge_keys(self, relation, inverse):
+        """
+        Returns:
+            the relationship types of all edges that entail an edge of the
+            given relation type, traversed forward or backward
+        """
+        keys = set()
+        for rel in self.sub_relations(relation):
+            inv_rels = self.rel_to_inverses.get(rel, ())
+            if inverse:
+                keys.add("inv_%s" % rel)
+                keys.update(inv_rels)
+            else:
+                keys.add(rel)
+                keys.update("inv_%s" % x for x in inv_rels)
+        return tuple(sorted(keys))
+
+    def _chains(self, relation):
+        chains = []
+        for rel in self.sub_relations(relation):
+            typedef = self.id_to_typedef.get(rel)
+            if typedef is not None:
+                chains.extend(typedef.holds_over_chain)
+        return chains
+
+    def _automaton(self, relation, via):
+        """
+        Build the automaton whose accepted edge sequences entail the
+        relation. Transitions are (state, relation, next state) triples.
+        The start state is PRE and the accepting state is POST.
+        """
+        transitions = [(PRE, "is_a", PRE), (PRE, relation, POST), (POST, "is_a", POST)]
+        if self.is_transitive(relation):
+            transitions.append((POST, relation, POST))
+        typedef = self.id_to_typedef.get(relation)
+        over_rels = set(via) if via else set()
+        if typedef is not None:
+            over_rels.update(typedef.transitive_over)
+        for rel in sorted(over_rels):
+            transitions.append((POST, rel, POST))
+
+        chain_starts = [PRE, POST] if self.is_transitive(relation) else [PRE]
+        n_states = 2
+        for chain in self._chains(relation):
+            for start in chain_starts:
+                curr = start
+                for i, rel in enumerate(chain):
+                    if i == len(chain) - 1:
+                        nxt = POST
+                    else:
+                        nxt = n_states
+                        n_states += 1
+                        transitions.append((nxt, "is_a", nxt))
+                        if self.is_transitive(rel):
+                            transitions.append((nxt, rel, nxt))
+                    transitions.append((curr, rel, nxt))
+                    curr = nxt
+        return n_states, transitions
+
+    def _compiled(self, relation, via, inverse):
+        key = (relation, tuple(sorted(via)) if via else (), inverse)
+        if key in self._automata:
+            return self._automata[key]
+        n_states, transitions = self._automaton(relation, via)
+        state_to_edges = [[] for _ in range(n_states)]
+        for src, rel, dst in transitions:
+            if inverse:
+                src, dst = dst, src
+            for edge_key in self._edge_keys(rel, inverse):
+                state_to_edges[src].append((self.og.adjacency(edge_key), dst))
+        compiled = (n_states, state_to_edges)
+        self._automata[key] = compiled
+        return compiled
+
+    def related(self, t_id, relation, via=None, inverse=False):
+        """
+        Gather all terms related to a term through a given relation.
+        Args:
+            t_id: the term ID
+            relation: the relation identifier (e.g. 'develops_from')
+            via: optional collection of additional relations over which
+                the relation is treated as transitive for this query. For
+                example, relation='develops_from' and via=['part_of']
+                gathers the terms that the term develops from, and all of
+                their parts' wholes.
+            inverse: if True, gather the terms X such that 'X relation t_id'
+                holds rather than the terms X such that 't_id relation X'
+                holds.
+        Returns:
+            the set of related term IDs
+        """
+        if t_id not in self.og.id_to_term:
+            return set()
+        term_ids, term_to_index = self.og.term_index()
+        members = self.og.member_mask()
+        n_states, state_to_edges = self._compiled(relation, via, inverse)
+        start, accept = (POST, PRE) if inverse else (PRE, POST)
+
+        t_idx = term_to_index[t_id]
+        visited = [set() for _ in range(n_states)]
+        visited[start].add(t_idx)
+        q = deque([(t_idx, start)])
+        while q:
+            curr_idx, state = q.popleft()
+            for adj, nxt in state_to_edges[state]:
+                nxt_visited = visited[nxt]
+                for rel_idx in adj[curr_idx]:
+                    if rel_idx not in nxt_visited:
+                        if members is not None and rel_idx not in members:
+                            continue
+                        nxt_visited.add(rel_idx)
+                        q.append((rel_idx, nxt))
+        return set(term_ids[x] for x in visited[accept])
@@ -0,0 +1,203 @@
+"""
+Topological ordering of the terms of an ontology graph with respect to a
+set of relationship types (e.g. 'is_a' and 'part_of').
+
+All state is kept in arrays indexed by the graph's integer term index, so
+that DAG-wide computations run in a single linear pass over the order.
+"""
+from array import array
+from collections import deque
+
+
+class TopologicalIndex:
+    def __init__(self, parents, members=None):
+        """
+        Args:
+            parents: list that maps each term index to the list of
+                indices of its parents
+            members: optional Bitset of the term indices to order. Other
+                indices must have no parents or children.
+        """
+        n_terms = len(parents)
+        children = [[] for _ in range(n_terms)]
+        n_parents = array("l", [0]) * n_terms
+        for t_idx, par_idxs in enumerate(parents):
+            n_parents[t_idx] = len(par_idxs)
+            for par_idx in par_idxs:
+                children[par_idx].append(t_idx)
+        self.parents = parents
+        self.children = children
+
+        order = _kahn_order(children, n_parents, members)
+        self.order = order
+        self.cycles = []
+        n_members = n_terms if members is None else len(members)
+        if len(order) < n_members:
+            self.cycles = _find_cycles(parents, n_parents)
+        self.depth = _longest_paths(order, children)
+        self.height = _longest_paths(order[::-1], parents)
+
+    def is_acyclic(self):
+        return not self.cycles
+
+    def aggregate(self, values, combine, bottom_up=True):
+        """
+        Propagate values through the graph in a single pass over the
+        topological order.
+        Args:
+            values: list mapping each term index to its initial value
+            combine: function taking the accumulated value of a term and
+                the value of one of its children (bottom-up) or parents
+                (top-down) and returning the new accumulated value
+            bottom_up: if True, values flow from children to parents.
+                Otherwise, values flow from parents to children.
+        Returns:
+            a list mapping each term index to its accumulated value
+        """
+        state = list(values)
+        if bottom_up:
+            for t_idx in reversed(self.order):
+                val = state[t_idx]
+                for par_idx in self.parents[t_idx]:
+                    state[par_idx] = combine(state[par_idx], val)
+        else:
+            for t_idx in self.order:
+                val = state[t_idx]
+                for child_idx in self.children[t_idx]:
+                    state[child_idx] = combine(state[child_idx], val)
+        return state
+
+
+def _kahn_order(children, n_parents, members=None):
+    """
+    Order the terms with Kahn's algorithm. Terms on, or below, a cycle are
+    never released and are left out of the order.
+    Args:
+        children: list mapping each term index to its children's indices
+        n_parents: array of each term's number of parents. It is consumed,
+            so that afterwards only terms on or below a cycle have a
+            nonzero count.
+        members: optional Bitset of the term indices to order
+    Returns:
+        an array of term indices, each after all of its parents
+    """
+    order = array("l")
+    q = deque(
+        x
+        for x in (range(len(children)) if members is None else members)
+        if n_parents[x] == 0
+    )
+    while q:
+        t_idx = q.popleft()
+        order.append(t_idx)
+        for child_idx in children[t_idx]:
+            n_parents[child_idx] -= 1
+            if n_parents[child_idx] == 0:
+                q.append(child_idx)
+    return order
+
+
+def _longest_paths(order, successors):
+    """
+    Args:
+        order: term indices, each after all of its predecessors
+        successors: list mapping each term index to the indices of the
+            terms that follow it
+    Returns:
+        an array mapping each term index to the length of the longest
+        path that reaches it along the order
+    """
+    length = array("l", [0]) * len(successors)
+    for t_idx in order:
+        n = length[t_idx] + 1
+        for succ_idx in successors[t_idx]:
+            if length[succ_idx] < n:
+                length[succ_idx] = n
+    return length
+
+
+def _find_cycles(parents, n_parents):
+    """
+    Find the strongly connected components, among the terms left over by
+    Kahn's algorithm, that contain a cycle (Tarjan's algorithm, iterative).
+    Args:
+        parents: list mapping each term index to its parents' indices
+        n_parents: the remaining parent counts after Kahn's algorithm.
+            Only terms with a nonzero count can be on a cycle.
+    Returns:
+        a list of cycles, each a sorted list of term indices
+    """
+    finder = _CycleFinder(parents, n_parents)
+    for root in sorted(finder.remaining):
+        if root not in finder.index:
+            finder.search(root)
+    return finder.cycles
+
+
+class _CycleFinder:
+    """
+    The state of an iterative Tarjan search over the terms left over by
+    Kahn's algorithm.
+    """
+
+    def __init__(self, parents, n_parents):
+        self.parents = parents
+        self.remaining = set(x for x in range(len(parents)) if n_parents[x] > 0)
+        self.index = {}
+        self.lowlink = {}
+        self.on_stack = set()
+        self.stack = []
+        self.cycles = []
+
+    def search(self, root):
+        work = [(root, 0)]
+        while work:
+            t_idx, i = work.pop()
+            if i == 0:
+                self._push(t_idx)
+            if self._descend(t_idx, i, work):
+                continue
+            if self.lowlink[t_idx] == self.index[t_idx]:
+                self._pop_component(t_idx)
+            if work:
+                caller = work[-1][0]
+                self.lowlink[caller] = min(self.lowlink[caller], self.lowlink[t_idx])
+
+    def _push(self, t_idx):
+        self.index[t_idx] = len(self.index)
+        self.lowlink[t_idx] = self.index[t_idx]
+        self.stack.append(t_idx)
+        self.on_stack.add(t_idx)
+
+    def _descend(self, t_idx, i, work):
+        """
+        Visit the parents of a term from its i-th on. If a parent has not
+        been visited, the term's state and the parent are pushed onto the
+        work stack.
+        Returns:
+            whether the search descended into a parent
+        """
+        par_idxs = self.parents[t_idx]
+        while i < len(par_idxs):
+            par_idx = par_idxs[i]
+            i += 1
+            if par_idx not in self.remaining:
+                continue
+            if par_idx not in self.index:
+                work.append((t_idx, i))
+                work.append((par_idx, 0))
+                return True
+            if par_idx in self.on_stack:
+                self.lowlink[t_idx] = min(self.lowlink[t_idx], self.index[par_idx])
+        return False
+
+    def _pop_component(self, t_idx):
+        component = []
+        while True:
+            x = self.stack.pop()
+            self.on_stack.discard(x)
+            component.append(x)
+            if x == t_idx:
+                break
+        if len(component) > 1 or t_idx in self.parents[t_idx]:
+            self.cycles.append(sorted(component))
@@ -0,0 +1,147 @@
+"""
+A bidirectional index between the terms of an ontology graph and the
+external identifiers (e.g. 'FMA:54527', 'UMLS_CUI:C0027882') that they
+cross-reference through their 'xref' tags.
+"""
+
+
+def normalize_xref(raw_xref):
+    """
+    Strip trailing qualifiers and whitespace from a raw xref string
+    (e.g. 'FMA:54527 {source="..."}' becomes 'FMA:54527').
+    """
+    tokens = raw_xref.split()
+    if not tokens:
+        return None
+    return tokens[0]
+
+
+def xref_prefix(xref):
+    return xref.split(":")[0]
+
+
+class XrefIndex:
+    def __init__(self, id_to_term, nonmappable_term_ids=None, og=None):
+        """
+        Args:
+            id_to_term: dictionary mapping term IDs to Term objects
+            nonmappable_term_ids: collection of term IDs that cannot be
+                mapped to. If None, then all terms are considered mappable.
+            og: the ontology graph that the index belongs to. Queries
+                that do not say whether to return only mappable terms use
+                the graph's 'mappable_only', or return only mappable terms
+                if there is no graph.
+        """
+        self.og = og
+        xref_to_ids = {}
+        id_to_xrefs = {}
+        for t_id, term in id_to_term.items():
+            if not term.xrefs:
+                continue
+            xrefs = []
+            for raw_xref in term.xrefs:
+                xref = normalize_xref(raw_xref)
+                if not xref or xref in xrefs:
+                    continue
+                xrefs.append(xref)
+                if xref not in xref_to_ids:
+                    xref_to_ids[xref] = []
+                xref_to_ids[xref].append(t_id)
+            if xrefs:
+                id_to_xrefs[t_id] = tuple(xrefs)
+
+        self.xref_to_ids = {
+            xref: tuple(sorted(t_ids))
+            for xref, t_ids in xref_to_ids.items()
+        }
+        self.id_to_xrefs = id_to_xrefs
+
+        # Only the xrefs that point to at least one nonmappable term
+        # need a separate, filtered entry. All other lookups of mappable
+        # terms are answered directly from 'xref_to_ids'.
+        self.xref_to_mappable_ids = {}
+        if nonmappable_term_ids:
+            for xref, t_ids in self.xref_to_ids.items():
+                if any(x in nonmappable_term_ids for x in t_ids):
+                    self.xref_to_mappable_ids[xref] = tuple(
+                        x for x in t_ids if x not in nonmappable_term_ids
+                    )
+
+    def __len__(self):
+        return len(self.xref_to_ids)
+
+    def __contains__(self, xref):
+        return xref in self.xref_to_ids
+
+    def xref_prefixes(self):
+        """
+        Returns:
+            the set of ID prefixes of all external identifiers in the
+            index (e.g. {'FMA', 'BTO', ...})
+        """
+        return set(xref_prefix(x) for x in self.xref_to_ids)
+
+    def _mappable_only(self, mappable_only):
+        if mappable_only is not None:
+            return mappable_only
+        return True if self.og is None else self.og.mappable_only
+
+    def translate(self, xref, mappable_only=None):
+        """
+        Args:
+            xref: an external identifier (e.g. 'FMA:54527')
+            mappable_only: only return terms that can be mapped to. If
+                None, the graph's default is used.
+        Returns:
+            a tuple of the term IDs that cross-reference the external
+            identifier
+        """
+        if self._mappable_only(mappable_only):
+            t_ids = self.xref_to_mappable_ids.get(xref)
+            if t_ids is not None:
+                return t_ids
+        return self.xref_to_ids.get(xref, ())
+
+    def translate_many(self, xrefs, prefixes=None, mappable_only=None):
+        """
+        Translate an iterable of external identifiers. The input is
+        consumed lazily, so this can be used to stream very large
+        collections of identifiers.
+        Args:
+            xrefs: iterable of external identifiers
+            prefixes: if supplied, only identifiers whose ID prefix is in
+                this collection are translated. All others are translated
+                to an empty tuple.
+            mappable_only: only return terms that can be mapped to. If
+                None, the graph's default is used.
+        Returns:
+            a generator of (xref, term IDs) tuples, one for each input
+            identifier, in input order
+        """
+        xref_to_ids = self.xref_to_ids
+        restricted = self.xref_to_mappable_ids if self._mappable_only(mappable_only) else {}
+        if prefixes is not None:
+            prefixes = set(prefixes)
+        for xref in xrefs:
+            if prefixes is not None and xref.split(":")[0] not in prefixes:
+                yield xref, ()
+                continue
+            t_ids = restricted.get(xref)
+            if t_ids is None:
+                t_ids = xref_to_ids.get(xref, ())
+            yield xref, t_ids
+
+    def xrefs_of(self, term_id, prefixes=None):
+        """
+        Args:
+            term_id: the ontology term ID
+            prefixes: if supplied, only return external identifiers whose
+                ID prefix is in this collection
+        Returns:
+            a tuple of the external identifiers cross-referenced by the term
+        """
+        xrefs = self.id_to_xrefs.get(term_id, ())
+        if prefixes is None:
+            return xrefs
+        prefixes = set(prefixes)
+        return tuple(x for x in xrefs if xref_prefix(x) in prefixes)
@@ -34,13 +34,14 @@ setup(
         'Topic :: Software Development :: Build Tools',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
     keywords='ontology utility obo graph bioinformatics',
     packages=find_packages(),
     include_package_data=True,
     zip_safe=False,
+    python_requires=">=3.9",
     install_requires=[],
 )
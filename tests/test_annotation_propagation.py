@@ -0,0 +1,52 @@
+from onto_lib import ontology_graph
+from onto_lib.annotation_propagation import *
+from onto_lib.load_ontology import load
+
+
+og = load("1")[0]
+
+annotations = [
+    ("s1", "CL:0000134"),  # mesenchymal stem cell
+    ("s1", "CL:0000034"),  # stem cell
+    ("s1", "CL:0000540"),  # neuron
+    ("s2", "CL:0000678"),
+    ("s2", "CL:9999999"),  # not in the ontology
+    ("s3", "CL:0000540"),
+]
+
+
+def test_iter_sample_chunks():
+    chunks = list(iter_sample_chunks(annotations, 2))
+    assert [len(x) for x in chunks] == [2, 1]
+    assert chunks[0][0] == ("s1", ["CL:0000134", "CL:0000034", "CL:0000540"])
+
+
+def test_propagate():
+    propagator = AnnotationPropagator(og)
+    labels = dict(propagator.propagate(annotations, chunk_size=2))
+    expected = ontology_graph.most_specific_terms(
+        ["CL:0000134", "CL:0000034", "CL:0000540"], og,
+        sup_relations=["is_a", "part_of"]
+    )
+    assert set(labels["s1"]) == set(expected)
+    assert labels["s2"] == ["CL:0000678"]
+    assert propagator.n_samples == 3
+    assert propagator.term_counts["CL:0000540"] == 3
+    assert propagator.term_counts["CL:0000034"] == 1
+    assert propagator.term_counts["CL:9999999"] == 0
+
+
+def test_run_processes(tmp_path):
+    annot_f = tmp_path / "annotations.tsv"
+    annot_f.write_text("".join("%s\t%s\n" % x for x in annotations))
+    labels_f = tmp_path / "labels.tsv"
+    serial = AnnotationPropagator(og).run(read_annotations(str(annot_f)))
+    parallel = AnnotationPropagator(og).run(
+        read_annotations(str(annot_f)),
+        labels_f=str(labels_f),
+        chunk_size=1,
+        processes=2
+    )
+    assert serial == parallel
+    lines = labels_f.read_text().splitlines()
+    assert [x.split("\t")[0] for x in lines] == ["s1", "s2", "s3"]
@@ -0,0 +1,82 @@
+import tracemalloc
+
+import pytest
+
+from onto_lib.attribute_index import AttributeIndex
+from onto_lib.load_ontology import load
+from onto_lib.ontology_graph import Term
+
+
+og = load("1")[0]
+
+
+@pytest.fixture
+def toy(toy_graph):
+    return toy_graph(
+        {"A": {}, "B": {"is_a": ["A"]}, "C": {"is_a": ["B"]}, "D": {"is_a": ["A"]}},
+        subsets={"A": ["slim"], "B": ["slim", "other"], "C": ["slim"]},
+        property_values={"B": {("P", "x")}, "C": {("P", "y")},
+                         "D": {("P", "x"), ("Q", "z")}},
+        nonmappable_terms=["C"]
+    )
+
+
+def test_subsets_and_properties(toy):
+    assert toy.attribute_index().subsets() == {"slim", "other"}
+    assert toy.attribute_index().properties() == {"P", "Q"}
+    assert toy.terms_in_subset("slim") == {"A", "B", "C"}
+    assert toy.terms_in_subset("slim", mappable_only=True) == {"A", "B"}
+    assert toy.terms_in_subset("unknown") == set()
+    assert toy.terms_with_property("P") == {"B", "C", "D"}
+    assert toy.terms_with_property("P", value="x") == {"B", "D"}
+    assert toy.terms_with_property("P", value="w") == set()
+
+
+def test_combine_with_closure(toy):
+    below_b = toy.closure_mask("B", ["inv_is_a"])
+    assert toy.mask_term_ids(below_b) == {"B", "C"}
+    assert toy.terms_in_subset("slim", within=below_b) == {"B", "C"}
+    assert toy.terms_with_property("P", value="x", within=below_b) == {"B"}
+    assert toy.mask_term_ids(toy.closure_mask("X", ["inv_is_a"])) == set()
+
+
+def test_matches_scan_on_cl():
+    index = og.attribute_index()
+    for subset in index.subsets():
+        assert og.terms_in_subset(subset) == set(
+            x for x, term in og.id_to_term.items() if subset in term.subsets
+        )
+    for prop in index.properties():
+        assert og.terms_with_property(prop) == set(
+            x
+            for x, term in og.id_to_term.items()
+            if any(p == prop for p, _ in term.property_values)
+        )
+    below = og.closure_mask("CL:0000003", ["inv_is_a", "inv_part_of"])
+    assert (og.terms_in_subset("ubprop:upper_level", within=below)
+            == og.terms_in_subset("ubprop:upper_level")
+            & og.recursive_relationship("CL:0000003", ["inv_is_a", "inv_part_of"]))
+
+
+def test_unique_property_values_stay_sparse():
+    n_terms = 20000
+    term_ids = ["T:%05d" % i for i in range(n_terms)]
+    id_to_term = {
+        x: Term(x, x, property_values={("IAO:0000116", "note %d" % i)})
+        for i, x in enumerate(term_ids)
+    }
+    term_to_index = {x: i for i, x in enumerate(term_ids)}
+    tracemalloc.start()
+    try:
+        index = AttributeIndex(id_to_term, term_ids, term_to_index)
+        size, _ = tracemalloc.get_traced_memory()
+        assert index.property_mask("IAO:0000116", "note 7") == index.property_mask("IAO:0000116", "note 7")
+        assert len(index.property_mask("IAO:0000116")) == n_terms
+        assert len(index.property_mask("IAO:0000116", "note 7")) == 1
+        size_after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # A dense Bitset per value would take n_terms^2 / 8 = 50 MB; the
+    # arrays take a few hundred bytes per value
+    assert size < 300 * n_terms
+    assert size_after - size < n_terms
@@ -0,0 +1,27 @@
+from onto_lib.bitset import *
+
+
+def test_add_contains():
+    b = Bitset(20)
+    b.add(0)
+    b.add(13)
+    assert 13 in b and 0 in b and 12 not in b
+    b.discard(13)
+    assert 13 not in b
+    assert list(b) == [0]
+
+
+def test_full():
+    b = Bitset.full(10)
+    assert len(b) == 10
+    assert list(b) == list(range(10))
+
+
+def test_set_operations():
+    a = Bitset.from_indices(100, [1, 50, 99])
+    b = Bitset.from_indices(100, [50, 60])
+    assert list(a & b) == [50]
+    assert list(a | b) == [1, 50, 60, 99]
+    assert list(a - b) == [1, 99]
+    assert len(a) == 3
+    assert not Bitset(100)
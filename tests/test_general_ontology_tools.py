@@ -108,3 +108,36 @@ def test_get_terms_within_radius():
                                   radius=2)
 
     assert 'CL:0000003' in res
+
+
+def test_explain_descendant():
+    paths = explain_descendant("CL:0000134", "CL:0000034",
+                               ont_id_to_og=ont_id_to_og)
+    assert len(paths) == 1
+    assert paths[0][0][0] == "CL:0000134"
+    assert paths[0][-1][2] == "CL:0000034"
+
+    assert explain_descendant("CL:0000034", "CL:0000134",
+                              ont_id_to_og=ont_id_to_og) == []
+
+    pair_to_path = explain_descendants(
+        [("CL:0000134", "CL:0000034"), ("CL:0000034", "CL:0000134")],
+        ont_id_to_og=ont_id_to_og
+    )
+    assert len(pair_to_path[("CL:0000134", "CL:0000034")]) == len(paths[0])
+    assert pair_to_path[("CL:0000034", "CL:0000134")] is None
+
+
+def test_get_terms_in_subset():
+    og = ont_id_to_og["17"]
+    subset = "ubprop:upper_level"
+    res = get_terms_in_subset(subset, ont_id_to_og=ont_id_to_og)
+    assert "CL:0000000" in res
+    res = get_terms_in_subset(subset, ont_id_to_og=ont_id_to_og,
+                              descendant_of="CL:0000003")
+    assert "CL:0000000" not in res
+    assert res == set(
+        x
+        for x in descendants("CL:0000003", ont_id_to_og=ont_id_to_og)
+        if subset in og.id_to_term[x].subsets
+    )
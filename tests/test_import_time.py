@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import onto_lib
+
+# Cumulative import time budget, in microseconds, for the public modules.
+# Importing them takes ~15ms without bytecode caches; importing
+# pkg_resources alone took ~100ms.
+IMPORT_BUDGET_US = 50000
+
+PUBLIC_MODULES = ["onto_lib.load_ontology", "onto_lib.general_ontology_tools"]
+
+DEFERRED_MODULES = ["pkg_resources", "importlib.resources", "concurrent.futures"]
+
+
+def _run(args):
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(onto_lib.__file__)))
+    return subprocess.run([sys.executable] + args, cwd=root_dir, check=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+
+
+def _import_times(modules):
+    stmt = "; ".join("import %s" % x for x in modules)
+    res = _run(["-X", "importtime", "-c", stmt])
+    mod_to_cumulative = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        tokens = line[len("import time:"):].split("|")
+        if not tokens[1].strip().isdigit():
+            continue  # the header line
+        mod_to_cumulative[tokens[2].strip()] = int(tokens[1])
+    return mod_to_cumulative
+
+
+def test_heavy_imports_deferred():
+    stmt = "import sys; import %s; print(','.join(x for x in %r if x in sys.modules))" % (
+        ", ".join(PUBLIC_MODULES), DEFERRED_MODULES
+    )
+    assert _run(["-c", stmt]).stdout.strip() == ""
+
+
+def test_import_time_budget():
+    mod_to_cumulative = _import_times(PUBLIC_MODULES)
+    total = sum(mod_to_cumulative[x] for x in PUBLIC_MODULES)
+    assert total < IMPORT_BUDGET_US
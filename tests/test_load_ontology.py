@@ -9,3 +9,49 @@ def test_main():
 def test_load():
     og, i, r = load("1")
     assert i[0] == 'CL'
+
+
+def test_background_loader(tmp_path):
+    loader = BackgroundLoader()
+    loader.load("1")
+    loader.load("7")
+    assert "1" in loader and "17" not in loader
+    assert loader.wait(timeout=120)
+    assert loader.is_ready("1") and loader.is_ready("7")
+    cl_og = loader["1"]
+    assert cl_og is not None and "CL:0000000" in cl_og.id_to_term
+    prog = loader.progress("7")
+    assert prog["ready"] and not prog["loading"]
+    assert prog["files_parsed"] == prog["n_files"] == 1
+    assert prog["terms_loaded"] == len(loader["7"].id_to_term)
+
+    # Reload UO from a release without one of its terms
+    uo_og = loader["7"]
+    removed = "UO:0000010"
+    assert removed in uo_og.id_to_term
+    with open(config.ontology_name_to_location()["UO"], "r") as f:
+        stanzas = f.read().split("\n\n")
+    new_obo_f = str(tmp_path / "uo.obo")
+    with open(new_obo_f, "w") as f:
+        f.write("\n\n".join(
+            x for x in stanzas
+            if "id: %s\n" % removed not in x + "\n"
+        ))
+    future = loader.load("7", ont_to_loc={"UO": new_obo_f})
+    assert loader["1"] is cl_og
+    new_uo_og = future.result()
+    assert loader.wait(timeout=120)
+    assert loader["7"] is new_uo_og
+    assert removed not in new_uo_og.id_to_term
+    assert len(new_uo_og.id_to_term) == len(uo_og.id_to_term) - 1
+    loader.shutdown()
+
+
+def test_background_loader_processes():
+    loader = BackgroundLoader(processes=True)
+    future = loader.load("7")
+    og = future.result()
+    assert loader.is_ready("7") and loader["7"] is og
+    prog = loader.progress("7")
+    assert prog["n_files"] is None and prog["terms_loaded"] == len(og.id_to_term)
+    loader.shutdown()
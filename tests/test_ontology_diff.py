@@ -0,0 +1,77 @@
+from onto_lib.config import ontology_name_to_location
+from onto_lib.ontology_diff import *
+
+
+UO_F = ontology_name_to_location()["UO"]
+
+
+def _new_release(tmp_path):
+    with open(UO_F, "r", encoding="utf-8") as f:
+        content = f.read()
+    content = content.replace("name: micrometer\n", "name: micrometre\n")
+    content = content.replace('synonym: "metre" EXACT []\n', "")
+    # Move 'second' from 'time unit' to 'length unit'
+    content = content.replace(
+        "id: UO:0000010\nname: second\n",
+        "id: UO:0000010\nname: second\nis_obsolete: true\n"
+    )
+    content = content.replace(
+        "is_a: UO:0000003 ! time unit\nis_a: UO:0000045 ! base unit",
+        "is_a: UO:0000001 ! length unit\nis_a: UO:0000045 ! base unit",
+        1
+    )
+    content += "\n[Term]\nid: UO:9999999\nname: new unit\nis_a: UO:0000000 ! unit\n"
+    new_f = tmp_path / "UO.new.obo"
+    new_f.write_text(content, encoding="utf-8")
+    return str(new_f)
+
+
+def test_snapshot_obo():
+    snap = snapshot_obo(UO_F)
+    assert snap["UO:0000008"].name == "meter"
+    assert ("is_a", "UO:0000001") in snap["UO:0000008"].edges
+
+
+def test_no_changes():
+    diff = diff_ontologies(UO_F, UO_F)
+    assert not any(diff.summary().values())
+
+
+def test_diff(tmp_path):
+    diff = diff_ontologies(UO_F, _new_release(tmp_path))
+    assert diff.added == {"UO:9999999"}
+    assert diff.renamed["UO:0000017"] == ("micrometer", "micrometre")
+    assert diff.synonyms_removed["UO:0000008"] == {"metre"}
+    assert "UO:0000010" in diff.obsoleted
+    assert ("is_a", "UO:0000003") in diff.edges_removed["UO:0000010"]
+    affected = diff.affected_terms(["UO:0000010", "UO:0000017", "UO:0000008"])
+    assert affected == {"UO:0000010": ["obsoleted"], "UO:0000017": ["renamed"]}
+
+
+def test_removed_term_edges(tmp_path):
+    with open(UO_F, "r", encoding="utf-8") as f:
+        content = f.read()
+    # Drop 'micrometer'
+    start = content.index("[Term]\nid: UO:0000017\n")
+    end = content.index("[Term]", start + 1)
+    new_f = tmp_path / "UO.new.obo"
+    new_f.write_text(content[:start] + content[end:], encoding="utf-8")
+    diff = diff_ontologies(UO_F, str(new_f))
+    assert diff.removed == {"UO:0000017"}
+    assert ("is_a", "UO:0000001") in diff.edges_removed["UO:0000017"]
+    assert "UO:0000017" not in diff.edges_added
+
+
+def test_closure_changed(tmp_path):
+    with open(UO_F, "r", encoding="utf-8") as f:
+        content = f.read()
+    # Move 'length unit', so the closures of all length units change
+    content = content.replace(
+        "id: UO:0000001\nname: length unit\n",
+        "id: UO:0000001\nname: length unit\nis_a: UO:0000003 ! time unit\n"
+    )
+    new_f = tmp_path / "UO.new.obo"
+    new_f.write_text(content, encoding="utf-8")
+    diff = diff_ontologies(UO_F, str(new_f))
+    assert {"UO:0000001", "UO:0000008", "UO:0000017"}.issubset(diff.closure_changed)
+    assert "UO:0000002" not in diff.closure_changed
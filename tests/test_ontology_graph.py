@@ -8,4 +8,72 @@ def test_term():
     )
     assert term.is_a() == []
 
+
+def test_parse_typedef():
+    lines = [
+        "[Typedef]\n",
+        "id: develops_from\n",
+        "name: develops from\n",
+        "holds_over_chain: part_of develops_from {source=\"x\"}\n",
+        "is_transitive: true\n",
+        "is_a: developmentally_preceded_by ! developmentally preceded by\n",
+        "inverse_of: develops_into ! develops into\n",
+        "transitive_over: part_of ! part of\n"
+    ]
+    entity_type, typedef, is_obsolete = parse_entity(lines, None)
+    assert entity_type == ENTITY_TYPE_DEF and not is_obsolete
+    assert typedef.is_transitive
+    assert typedef.is_a == ['developmentally_preceded_by']
+    assert typedef.inverse_of == ['develops_into']
+    assert typedef.transitive_over == ['part_of']
+    assert typedef.holds_over_chain == [('part_of', 'develops_from')]
+
+
+def test_parse_relationships_restrict_to_idspaces():
+    attrs = {
+        "is_a": ["CL:0000000 ! cell"],
+        "relationship": ["capable_of GO:0019226 ! transmission of nerve impulse",
+                         "develops_from CL:0000031 ! neuroblast"]
+    }
+    rels = parse_relationships(attrs, ["CL"])
+    assert rels == {"is_a": ["CL:0000000"], "develops_from": ["CL:0000031"]}
+
+
+# 'B' and 'D' cannot be mapped to, and 'C' and 'D' share the name 'c'
+TOY_GRAPH = {
+    "relationships": {
+        "A": {}, "B": {"is_a": ["A"]}, "C": {"is_a": ["B"]}, "D": {"is_a": ["A"]}
+    },
+    "names": {"A": "root", "D": "c"},
+    "nonmappable_terms": ["B", "D"],
+}
+
+
+def test_mappable_per_call(toy_graph):
+    og = toy_graph(**TOY_GRAPH)
+    assert og.recursive_relationship("C", ["is_a"]) == {"A", "B", "C"}
+    assert og.recursive_relationship("C", ["is_a"], mappable_only=True) == {"A", "C"}
+    assert og.terms_within_radius("A", 1, ["inv_is_a"], mappable_only=True) == set()
+    assert og.term_ids_for_name("c", mappable_only=True) == {"C"}
+    assert most_specific_terms(["A", "B"], og, mappable_only=True) == ["A"]
+
+
+def test_mappable_per_graph(toy_graph):
+    og = toy_graph(mappable_only=True, **TOY_GRAPH)
+    assert og.recursive_relationship("A", ["inv_is_a"]) == {"A", "C"}
+    assert og.recursive_relationship("A", ["inv_is_a"], mappable_only=False) == {"A", "B", "C", "D"}
+    assert og.get_mappable_term_ids() == {"A", "C"}
+    assert [x.id for x in og.get_mappable_terms()] == ["A", "C"]
+    assert og.is_mappable("C") and not og.is_mappable("D")
+
+
+def test_interned_adjacency(toy_graph):
+    og = toy_graph(**TOY_GRAPH)
+    term_ids, term_to_index = og.term_index()
+    assert term_ids == ["A", "B", "C", "D"]
+    assert og.adjacency("is_a")[term_to_index["C"]] == (term_to_index["B"],)
+    assert og.adjacency("part_of") == [(), (), (), ()]
+    assert og.reachable_indices(term_to_index["C"], ["is_a"]) == {0, 1, 2}
+    assert sorted(most_specific_terms(["A", "B", "C", "D"], og)) == ["C", "D"]
+
 # TODO: Need actual tests here eventually...
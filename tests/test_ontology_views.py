@@ -0,0 +1,162 @@
+import pytest
+
+from onto_lib import general_ontology_tools as ogt
+from onto_lib.load_ontology import load, load_consolidated
+from onto_lib.ontology_graph import build_ontology
+from onto_lib.ontology_views import OntologyView
+
+# Two ontologies whose files each define stubs of the other's terms. 'AA'
+# is parsed first, so the consolidated graph keeps the 'BB' file's
+# definition of 'AA:0000002' and 'BB:0000002'.
+AA_OBO = """format-version: 1.2
+
+[Term]
+id: AA:0000001
+name: a root
+
+[Term]
+id: AA:0000002
+name: a child
+is_a: AA:0000001 ! a root
+xref: FMA:1
+
+[Term]
+id: BB:0000002
+name: b stub
+xref: FMA:2
+"""
+
+BB_OBO = """format-version: 1.2
+
+[Term]
+id: BB:0000001
+name: b root
+
+[Term]
+id: BB:0000002
+name: b child
+is_a: BB:0000001 ! b root
+
+[Term]
+id: AA:0000002
+name: a child imported
+is_a: AA:0000003 ! a stub
+xref: FMA:3
+
+[Term]
+id: AA:0000003
+name: a stub
+"""
+
+
+@pytest.fixture(scope="module")
+def consolidated():
+    return load_consolidated(["1", "7"])
+
+
+@pytest.fixture(scope="module")
+def cl_og():
+    og, _, _ = load("1")
+    return og
+
+
+@pytest.fixture(scope="module")
+def uo_og():
+    og, _, _ = load("7")
+    return og
+
+
+def test_views_match_separately_loaded_graphs(consolidated, cl_og, uo_og):
+    assert set(consolidated) == {"1", "7"}
+    for view, og in ((consolidated["1"], cl_og), (consolidated["7"], uo_og)):
+        assert set(view.id_to_term) == set(og.id_to_term)
+        assert len(view.id_to_term) == len(og.id_to_term)
+        assert view.mappable_term_ids == og.mappable_term_ids
+
+
+def test_view_queries(consolidated, cl_og):
+    view = consolidated["1"]
+    for t_id in sorted(cl_og.id_to_term)[::50]:
+        assert view.recursive_subterms(t_id) == cl_og.recursive_subterms(t_id)
+        assert view.recursive_superterms(t_id) == cl_og.recursive_superterms(t_id)
+        assert (view.recursive_relationship(t_id, ["is_a", "part_of"])
+                == cl_og.recursive_relationship(t_id, ["is_a", "part_of"]))
+    for t_id in ("CL:0000540", "CL:0000031", "CL:0000133"):
+        for inverse in (False, True):
+            assert (view.related_terms(t_id, "develops_from", inverse=inverse)
+                    == cl_og.related_terms(t_id, "develops_from", inverse=inverse))
+    assert "UO:0000000" not in view.id_to_term
+    assert view.recursive_subterms("UO:0000000") == set()
+    assert len(view.topological_order()) == len(cl_og.id_to_term)
+    path = view.path_index().shortest_path("CL:0000236", "CL:0000000")
+    assert len(path) == len(cl_og.path_index().shortest_path("CL:0000236", "CL:0000000"))
+    assert all(a in view.id_to_term and b in view.id_to_term for a, _, b in path)
+    assert (set(view.topological_order(["is_a"]))
+            == set(cl_og.topological_order(["is_a"])))
+
+
+def test_view_mappable_terms(consolidated, cl_og):
+    view = consolidated["1"]
+    for t_id in cl_og.nonmappable_terms:
+        assert not view.is_mappable(t_id)
+    assert (view.recursive_relationship("CL:0000000", ["inv_is_a"], mappable_only=True)
+            == cl_og.recursive_relationship("CL:0000000", ["inv_is_a"], mappable_only=True))
+    assert (view.term_ids_for_name("cell")
+            == cl_og.term_ids_for_name("cell"))
+    for mappable_only in (None, True, False):
+        assert (view.xref_index.translate("FMA:68646", mappable_only=mappable_only)
+                == cl_og.xref_index.translate("FMA:68646", mappable_only=mappable_only))
+
+
+def test_general_tools_with_consolidated(consolidated, cl_og):
+    t_ids = ["CL:0000236", "CL:0000542", "CL:0000000"]
+    assert (ogt.most_specific_terms(t_ids, consolidated, ont_id="1")
+            == ogt.most_specific_terms(t_ids, {"1": cl_og}, ont_id="1"))
+    assert (ogt.get_term_xrefs("CL:0000236", consolidated, ont_id="1")
+            == ogt.get_term_xrefs("CL:0000236", {"1": cl_og}, ont_id="1"))
+    xrefs = ["FMA:68646", "FMA:54527"]
+    assert (ogt.translate_xrefs(xrefs, consolidated, ont_id="1")
+            == ogt.translate_xrefs(xrefs, {"1": cl_og}, ont_id="1"))
+    assert ogt.translate_xrefs(xrefs, {"1": cl_og}, ont_id="1")["FMA:68646"] == ["CL:0000000"]
+
+
+def _assert_same_graph(view, og):
+    assert set(view.id_to_term) == set(og.id_to_term)
+    for t_id, term in og.id_to_term.items():
+        assert view.id_to_term[t_id].name == term.name
+        assert view.recursive_superterms(t_id) == og.recursive_superterms(t_id)
+        assert view.recursive_subterms(t_id) == og.recursive_subterms(t_id)
+        assert view.term_ids_for_name(term.name) == og.term_ids_for_name(term.name)
+        assert view.xref_index.xrefs_of(t_id) == og.xref_index.xrefs_of(t_id)
+    for xref in ("FMA:1", "FMA:2", "FMA:3"):
+        assert view.xref_index.translate(xref) == og.xref_index.translate(xref)
+    assert (dict(view.xref_index.translate_many(["FMA:1", "FMA:2", "FMA:3"]))
+            == dict(og.xref_index.translate_many(["FMA:1", "FMA:2", "FMA:3"])))
+    assert set(view.topological_order()) == set(og.topological_order())
+
+
+@pytest.mark.parametrize("ontologies,id_spaces,roots", [
+    (["AA"], ["AA", "BB"], None),
+    (["AA"], ["AA"], ["AA:0000001"]),
+    (["BB"], ["AA", "BB"], None),
+    (["BB"], ["BB"], ["BB:0000001"]),
+    (["AA", "BB"], ["AA", "BB"], None),
+])
+def test_views_of_overlapping_files(tmp_path, ontologies, id_spaces, roots):
+    aa_f = tmp_path / "AA.obo"
+    aa_f.write_text(AA_OBO)
+    bb_f = tmp_path / "BB.obo"
+    bb_f.write_text(BB_OBO)
+    ont_to_loc = {"AA": str(aa_f), "BB": str(bb_f)}
+    base = build_ontology(ont_to_loc, restrict_to_idspaces=["AA", "BB"],
+                          record_sources=True)
+    view = OntologyView(base, id_spaces=id_spaces, restrict_to_roots=roots,
+                        ontologies=ontologies)
+    og = build_ontology({x: y for x, y in ont_to_loc.items() if x in ontologies},
+                        restrict_to_idspaces=id_spaces, restrict_to_roots=roots)
+    _assert_same_graph(view, og)
+
+
+def test_view_ontologies_need_recorded_sources(cl_og):
+    with pytest.raises(ValueError):
+        OntologyView(cl_og, ontologies=["CL"])
@@ -0,0 +1,92 @@
+import itertools
+
+import pytest
+
+from onto_lib.load_ontology import load
+
+
+og = load("1")[0]
+
+
+#     A
+#    / \
+#   B   C
+#   |\ / \
+#   | D   E
+#    \   /
+#      F
+TOY_RELATIONSHIPS = {
+    "A": {},
+    "B": {"is_a": ["A"]},
+    "C": {"is_a": ["A"]},
+    "D": {"is_a": ["B"], "part_of": ["C"]},
+    "E": {"is_a": ["C"]},
+    "F": {"is_a": ["B", "E"]},
+}
+
+
+@pytest.fixture
+def toy(toy_graph):
+    return toy_graph(TOY_RELATIONSHIPS)
+
+
+def _is_valid(path, source, target, paths):
+    if not path:
+        return source == target
+    assert path[0][0] == source and path[-1][2] == target
+    for (a, rel, b), (c, _, _) in zip(path, path[1:] + [(target, None, None)]):
+        assert b == c
+        assert b in paths.id_to_term[a].get_related_terms(rel)
+    return True
+
+
+def test_shortest_path(toy):
+    paths = toy.path_index()
+    assert paths.shortest_path("D", "D") == []
+    assert paths.shortest_path("D", "C") == [("D", "part_of", "C")]
+    assert len(paths.shortest_path("F", "A")) == 2
+    assert paths.shortest_path("A", "D") is None
+    assert paths.shortest_path("D", "X") is None
+    assert toy.path_index(["is_a"]).shortest_path("D", "C") is None
+
+
+def test_k_shortest_and_all_paths(toy):
+    paths = toy.path_index()
+    k_paths = paths.k_shortest_paths("F", "A", 10)
+    assert [len(x) for x in k_paths] == [2, 3]
+    all_paths = list(paths.all_paths("F", "A"))
+    assert sorted(map(tuple, all_paths)) == sorted(map(tuple, k_paths))
+    assert list(paths.all_paths("F", "A", max_length=2)) == [k_paths[0]]
+    assert paths.k_shortest_paths("F", "A", 1) == [k_paths[0]]
+    assert len(paths.k_shortest_paths("D", "A", 5)) == 2
+
+
+def test_shortest_paths_match_bfs_distances():
+    paths = og.path_index()
+    t_ids = sorted(og.id_to_term)[::40]
+    pairs = list(itertools.product(t_ids, ["CL:0000000", "CL:0000003"] + t_ids[:5]))
+    batch = paths.shortest_paths(pairs)
+    for source, target in pairs:
+        path = paths.shortest_path(source, target)
+        assert (path is None) == (batch[(source, target)] is None)
+        if path is None:
+            assert target not in og.recursive_relationship(source, ["is_a", "part_of"])
+            continue
+        dist = paths.distances_to(target)
+        assert len(path) == dist[og.term_index()[1][source]]
+        assert len(batch[(source, target)]) == len(path)
+        assert _is_valid(path, source, target, paths)
+
+
+def test_k_shortest_paths_on_cl():
+    paths = og.path_index()
+    k_paths = paths.k_shortest_paths("CL:0000236", "CL:0000000", 5)
+    assert k_paths
+    assert len(k_paths[0]) == len(paths.shortest_path("CL:0000236", "CL:0000000"))
+    assert [len(x) for x in k_paths] == sorted(len(x) for x in k_paths)
+    assert len(set(map(tuple, k_paths))) == len(k_paths)
+    for path in k_paths:
+        assert _is_valid(path, "CL:0000236", "CL:0000000", paths)
+    bounded = list(paths.all_paths("CL:0000236", "CL:0000000",
+                                   max_length=len(k_paths[-1])))
+    assert set(map(tuple, k_paths)) <= set(map(tuple, bounded))
@@ -0,0 +1,44 @@
+import json
+
+from onto_lib.profile_build import main, compare_reports
+
+
+def _report(peak_rss_kb, traced_peak_bytes):
+    return {
+        "configs": {
+            "7": {
+                "peak_rss_kb": peak_rss_kb,
+                "peak_traced_bytes": traced_peak_bytes,
+                "phases": [{"name": "parse_obo:UO",
+                            "traced_peak_bytes": traced_peak_bytes}]
+            },
+            "17": {"error": ["FileNotFoundError"]}
+        }
+    }
+
+
+def test_compare_reports():
+    baseline = _report(1000, 2000)
+    assert compare_reports(_report(1050, 2000), baseline, 0.1) == []
+    regressions = compare_reports(_report(1000, 2500), baseline, 0.1)
+    assert len(regressions) == 2
+    assert any("parse_obo:UO" in x for x in regressions)
+    assert compare_reports(_report(1000, 2500), baseline, 0.5) == []
+
+
+def test_profile_config(tmp_path):
+    report_f = str(tmp_path / "report.json")
+    assert main(["7", "--output", report_f]) == 0
+    with open(report_f, "r") as f:
+        report = json.load(f)
+    prof = report["configs"]["7"]
+    assert prof["n_terms"] > 0
+    assert prof["peak_traced_bytes"] > 0
+    names = [x["name"] for x in prof["phases"]]
+    assert names == ["parse_obo:UO", "inverse_edges", "synonym_enrichment", "graph_indexes"]
+    for phase in prof["phases"]:
+        assert phase["traced_peak_bytes"] <= prof["peak_traced_bytes"]
+
+    # The build compared against itself, with a loose tolerance
+    assert main(["7", "--baseline", report_f, "--tolerance", "1.0",
+                 "--output", str(tmp_path / "report2.json")]) == 0
@@ -0,0 +1,121 @@
+import pytest
+
+from onto_lib.load_ontology import load
+from onto_lib.ontology_graph import parse_entity
+
+
+og = load("1")[0]
+
+
+def test_typedefs_loaded():
+    assert og.id_to_typedef['part_of'].is_transitive
+
+
+def test_inverse_edges():
+    # Every relationship type gets an inverse edge
+    assert 'CL:0000540' in og.id_to_term['CL:0000031'].get_related_terms('inv_develops_from')
+
+
+def test_related_transitive():
+    res = og.related_terms('CL:0000540', 'develops_from')  # neuron
+    assert 'CL:0000031' in res  # neuroblast
+    assert 'CL:0000133' in res  # neurectodermal cell
+
+
+def test_related_inverse():
+    res = og.related_terms('CL:0000031', 'develops_from', inverse=True)
+    assert 'CL:0000540' in res  # neuron
+    # Subtypes of neuron inherit the relationship through 'is_a'
+    assert 'CL:0000678' in res
+
+
+def test_related_via():
+    res = og.related_terms('CL:0000133', 'develops_from', inverse=True)
+    res_via = og.related_terms('CL:0000133', 'develops_from', inverse=True, via=['part_of'])
+    assert res.issubset(res_via)
+
+
+def test_related_missing_term():
+    assert og.related_terms('CL:9999999', 'develops_from') == set()
+
+
+def test_related_reuses_compiled_automaton():
+    og.related_terms('CL:0000540', 'develops_from')
+    automata = dict(og._relation_closure._automata)
+    assert ('develops_from', (), False) in automata
+    og.related_terms('CL:0000540', 'develops_from')
+    assert og._relation_closure._automata == automata
+    assert (og._relation_closure._automata[('develops_from', (), False)]
+            is automata[('develops_from', (), False)])
+
+
+TYPEDEF_STANZAS = [
+    ["[Typedef]\n", "id: part_of\n", "name: part of\n", "is_transitive: true\n"],
+    ["[Typedef]\n", "id: derives_from\n", "name: derives from\n"],
+    [
+        "[Typedef]\n", "id: develops_from\n", "name: develops from\n",
+        "is_a: derives_from ! derives from\n",
+        "equivalent_to_chain: part_of develops_from\n",
+    ],
+    [
+        "[Typedef]\n", "id: develops_into\n", "name: develops into\n",
+        "inverse_of: develops_from ! develops from\n",
+    ],
+    [
+        "[Typedef]\n", "id: located_in\n", "name: located in\n",
+        "transitive_over: part_of ! part of\n",
+    ],
+]
+
+
+@pytest.fixture
+def toy(toy_graph):
+    id_to_typedef = {}
+    for lines in TYPEDEF_STANZAS:
+        typedef = parse_entity(lines, None)[1]
+        id_to_typedef[typedef.id] = typedef
+    return toy_graph(
+        {
+            # X part_of Y, Y develops_from Z, Z develops_from W, and
+            # V develops_into X
+            "X": {"part_of": ["Y"]},
+            "Y": {"develops_from": ["Z"]},
+            "Z": {"develops_from": ["W"]},
+            "W": {},
+            "V": {"develops_into": ["X"]},
+            # L1 located_in L2, L2 located_in L3, L2 part_of P part_of Q
+            "L1": {"located_in": ["L2"]},
+            "L2": {"located_in": ["L3"], "part_of": ["P"]},
+            "L3": {},
+            "P": {"part_of": ["Q"]},
+            "Q": {},
+        },
+        id_to_typedef=id_to_typedef
+    )
+
+
+def test_related_chain_and_inverse_of(toy):
+    # The part_of o develops_from chain gives X develops_from Z, and
+    # V develops_into X gives X develops_from V. develops_from is not
+    # transitive, so W is not reached.
+    assert toy.related_terms("X", "develops_from") == {"V", "Z"}
+    assert toy.related_terms("Y", "develops_from") == {"Z"}
+    assert toy.related_terms("Z", "develops_from", inverse=True) == {"X", "Y"}
+    assert toy.related_terms("V", "develops_from", inverse=True) == {"X"}
+    assert toy.related_terms("W", "develops_from", inverse=True) == {"Z"}
+
+
+def test_related_sub_relations(toy):
+    # develops_from is_a derives_from
+    assert toy.related_terms("X", "derives_from") == {"V", "Z"}
+    assert toy.related_terms("Z", "derives_from", inverse=True) == {"X", "Y"}
+    assert toy.related_terms("X", "part_of") == {"Y"}
+
+
+def test_related_transitive_over(toy):
+    # located_in is transitive over part_of, but not transitive itself
+    assert toy.related_terms("L1", "located_in") == {"L2", "P", "Q"}
+    assert toy.related_terms("Q", "located_in", inverse=True) == {"L1"}
+    assert toy.related_terms("L3", "located_in", inverse=True) == {"L2"}
+    assert toy.related_terms("L2", "located_in") == {"L3"}
+    assert toy.related_terms("P", "part_of", inverse=True) == {"L2"}
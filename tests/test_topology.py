@@ -0,0 +1,64 @@
+import pytest
+
+from onto_lib.load_ontology import load
+
+
+og = load("1")[0]
+
+
+#     A
+#    / \
+#   B   C
+#    \ / \
+#     D   E
+TOY_RELATIONSHIPS = {
+    "A": {},
+    "B": {"is_a": ["A"]},
+    "C": {"is_a": ["A"]},
+    "D": {"is_a": ["B"], "part_of": ["C"]},
+    "E": {"is_a": ["C"]},
+}
+
+
+@pytest.fixture
+def toy(toy_graph):
+    return toy_graph(TOY_RELATIONSHIPS)
+
+
+def test_topological_order(toy):
+    order = toy.topological_order()
+    assert order[0] == "A"
+    assert order.index("D") > order.index("B")
+    assert order.index("D") > order.index("C")
+
+
+def test_levels(toy):
+    assert toy.term_depths() == {"A": 0, "B": 1, "C": 1, "D": 2, "E": 2}
+    assert toy.term_heights() == {"A": 2, "B": 1, "C": 1, "D": 0, "E": 0}
+    assert toy.term_depths(relations=["is_a"])["D"] == 2
+
+
+def test_aggregate(toy):
+    n_leaves = toy.aggregate({"D": 1, "E": 1}, lambda x, y: x + y, default=0)
+    # Counts paths, so the leaf 'D' reaches 'A' along two paths
+    assert n_leaves == {"A": 3, "B": 1, "C": 2, "D": 1, "E": 1}
+    depth = toy.aggregate({"A": 0}, lambda x, y: max(x, y + 1),
+                          bottom_up=False, default=0)
+    assert depth == toy.term_depths()
+
+
+def test_cycles(toy_graph):
+    toy = toy_graph(dict(TOY_RELATIONSHIPS, A={"part_of": ["D"]}))
+    cycles = toy.find_cycles()
+    assert len(cycles) == 1 and set(cycles[0]) == {"A", "B", "C", "D"}
+    assert toy.find_cycles(relations=["is_a"]) == []
+    with pytest.raises(ValueError):
+        toy.topological_order()
+
+
+def test_cl_order():
+    order = og.topological_order()
+    assert len(order) == len(og.id_to_term)
+    position = {x: i for i, x in enumerate(order)}
+    assert position["CL:0000034"] < position["CL:0000134"]
+    assert og.term_heights()["CL:0000034"] > 0
@@ -0,0 +1,47 @@
+from onto_lib.load_ontology import load
+from onto_lib.xref_index import *
+
+
+og = load("1")[0]
+
+
+def test_normalize_xref():
+    assert normalize_xref('FMA:54527 {source="x"}') == 'FMA:54527'
+    assert normalize_xref('  ') is None
+
+
+def test_translate():
+    assert og.xref_index.translate('FMA:54527') == ('CL:0000540',)
+    assert og.xref_index.translate('FOO:0000001') == ()
+
+
+def test_translate_mappable_only():
+    # CL:0000000 is excluded from configuration 1
+    assert og.xref_index.translate('FMA:68646', mappable_only=True) == ()
+    assert og.xref_index.translate('FMA:68646', mappable_only=False) == ('CL:0000000',)
+    assert dict(og.xref_index.translate_many(['FMA:68646'], mappable_only=True)) == {'FMA:68646': ()}
+
+
+def test_translate_graph_default():
+    # Queries follow the graph's mappable_only unless told otherwise
+    assert og.xref_index.translate('FMA:68646') == ('CL:0000000',)
+    og.mappable_only = True
+    try:
+        assert og.xref_index.translate('FMA:68646') == ()
+        assert dict(og.xref_index.translate_many(['FMA:68646'])) == {'FMA:68646': ()}
+    finally:
+        og.mappable_only = False
+
+
+def test_translate_many_prefixes():
+    res = dict(og.xref_index.translate_many(
+        ['FMA:54527', 'BTO:0000938', 'FOO:1'],
+        prefixes=['FMA']
+    ))
+    assert res == {'FMA:54527': ('CL:0000540',), 'BTO:0000938': (), 'FOO:1': ()}
+
+
+def test_xrefs_of():
+    assert 'FMA:54527' in og.xref_index.xrefs_of('CL:0000540')
+    assert og.xref_index.xrefs_of('CL:0000540', prefixes=['BTO']) == ('BTO:0000938',)
+    assert 'FMA' in og.xref_index.xref_prefixes()